@@ -0,0 +1,484 @@
+#!/usr/bin/env python3
+"""Benchmarks for ZortosHub against a local fake repository server.
+
+Measures catalog loading (cold, revalidated and from the snapshot), search
+latency, listing time, download throughput, the install pipeline (with
+the fake mount backend) and peak memory, and writes the results as JSON
+that a later run can be compared against:
+
+    python bench.py --output before.json
+    python bench.py --baseline before.json
+"""
+
+import os
+import sys
+import json
+import time
+import gzip
+import random
+import shutil
+import hashlib
+import platform
+import tempfile
+import threading
+import statistics
+import tracemalloc
+import contextlib
+import io
+import http.server
+from typing import Callable, Dict, List, Optional
+
+# main.py reads its settings when it is imported, so isolate it first
+WORK_DIR = tempfile.mkdtemp(prefix='zortoshub-bench-')
+os.environ['ZORTOSHUB_CACHE_DIR'] = os.path.join(WORK_DIR, 'cache')
+os.environ['ZORTOSHUB_APP_DIRS'] = os.path.join(WORK_DIR, 'Applications')
+os.environ['ZORTOSHUB_DOWNLOAD_CACHE_MAX'] = '0'
+os.environ['ZORTOSHUB_PROGRESS'] = 'none'
+os.environ['ZORTOSHUB_MOUNT_BACKEND'] = 'fake'  # payloads aren't real disk images
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import main
+from main import Colors, color_print, pop_option, parse_rate, format_size
+
+DEFAULT_SIZES = [10, 1000, 10000]
+DEFAULT_PAYLOAD = '32M'
+DEFAULT_REPEAT = 3
+DEFAULT_THRESHOLD = 10.0  # percent slower than the baseline that counts as a regression
+SEARCH_QUERIES = ['app', 'video editor', 'photo', 'utilty', 'network monitor', 'zip']
+WORDS = ['photo', 'video', 'audio', 'editor', 'studio', 'network', 'monitor', 'music', 'code', 'disk',
+         'cleaner', 'archive', 'zip', 'browser', 'mail', 'notes', 'player', 'converter', 'backup', 'sync',
+         'terminal', 'design', 'vector', 'paint', 'screen', 'capture', 'window', 'manager', 'clipboard', 'timer']
+CATEGORIES = ['Audio', 'Developer Tools', 'Games', 'Graphics', 'Productivity', 'Utilities', 'Video', 'Network']
+
+# Fake repository server
+def synthetic_catalog(count: int, base: str, seed: int = 1) -> bytes:
+    """Generate a deterministic apps.json with `count` apps."""
+    rng = random.Random(seed)
+    apps = {}
+    for i in range(count):
+        name = ' '.join(rng.choice(WORDS).title() for _ in range(rng.randint(1, 3)))
+        apps[f"app{i}"] = {
+            'name': f"{name} {i}",
+            'description': ' '.join(rng.choice(WORDS) for _ in range(rng.randint(5, 15))),
+            'url': f"{base}/files/{1024 * 1024}.bin",
+            'filename': f"app{i}.dmg",
+            'category': rng.choice(CATEGORIES),
+            'icon': '',
+            'status': rng.choice(['free', 'cracked']),
+            'version': f"{rng.randint(1, 9)}.{rng.randint(0, 20)}",
+        }
+    return json.dumps(apps, indent=4).encode()
+
+def synthetic_payload(size: int) -> bytes:
+    """Generate `size` bytes of incompressible, deterministic data."""
+    block = random.Random(size).randbytes(1024 * 1024) if hasattr(random.Random, 'randbytes') else os.urandom(1024 * 1024)
+    return (block * (size // len(block) + 1))[:size]
+
+class FakeRepositoryServer:
+    """Local HTTP server for synthetic catalogs and payload files.
+
+    Routes:
+        /catalog/<count>.json           a catalog of <count> apps (ETag, gzip)
+        /files/<size>.bin               <size> bytes of payload (Range, ETag)
+        /redirect/<hops>/<path>         302 chain of <hops> hops ending at /<path>
+
+    `latency` seconds are added before every response and `bandwidth` caps
+    each connection in bytes per second (0 for unlimited).
+    """
+    def __init__(self, latency: float = 0.0, bandwidth: int = 0):
+        self.latency = latency
+        self.bandwidth = bandwidth
+        self.requests = 0
+        self._bodies = {}
+        self._lock = threading.Lock()
+        server = self
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                server.handle(self)
+
+            def do_HEAD(self):
+                server.handle(self, head=True)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.httpd = http.server.ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.httpd.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}"
+
+    def __enter__(self) -> 'FakeRepositoryServer':
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def body(self, path: str) -> Optional[bytes]:
+        with self._lock:
+            if path not in self._bodies:
+                name, _, ext = path.rpartition('/')[2].partition('.')
+                if not name.isdigit():
+                    return None
+                if path.startswith('/catalog/') and ext == 'json':
+                    self._bodies[path] = synthetic_catalog(int(name), self.url)
+                elif path.startswith('/files/') and ext == 'bin':
+                    self._bodies[path] = synthetic_payload(int(name))
+                else:
+                    return None
+            return self._bodies[path]
+
+    def handle(self, request, head: bool = False) -> None:
+        with self._lock:
+            self.requests += 1
+        if self.latency:
+            time.sleep(self.latency)
+        path = request.path.split('?')[0]
+
+        if path.startswith('/redirect/'):
+            _, _, hops, rest = path.split('/', 3)
+            location = f"/redirect/{int(hops) - 1}/{rest}" if int(hops) > 1 else f"/{rest}"
+            request.send_response(302)
+            request.send_header('Location', location)
+            request.send_header('Content-Length', '0')
+            request.end_headers()
+            return
+
+        body = self.body(path)
+        if body is None:
+            request.send_response(404)
+            request.send_header('Content-Length', '0')
+            request.end_headers()
+            return
+
+        etag = f'"{hashlib.md5(body[:65536]).hexdigest()}-{len(body)}"'
+        if request.headers.get('If-None-Match') == etag:
+            request.send_response(304)
+            request.send_header('ETag', etag)
+            request.send_header('Content-Length', '0')
+            request.end_headers()
+            return
+
+        status, start, end = 200, 0, len(body) - 1
+        range_header = request.headers.get('Range', '')
+        if_range = request.headers.get('If-Range')
+        if range_header.startswith('bytes=') and (not if_range or if_range == etag):
+            first, _, last = range_header[6:].partition('-')
+            start = int(first) if first else len(body) - int(last)
+            end = min(int(last), len(body) - 1) if first and last else len(body) - 1
+            if start >= len(body):
+                request.send_response(416)
+                request.send_header('Content-Range', f"bytes */{len(body)}")
+                request.send_header('Content-Length', '0')
+                request.end_headers()
+                return
+            status = 206
+
+        payload = body[start:end + 1]
+        compress = path.endswith('.json') and 'gzip' in (request.headers.get('Accept-Encoding') or '')
+        if compress:
+            payload = gzip.compress(payload, compresslevel=1)
+        request.send_response(status)
+        request.send_header('ETag', etag)
+        request.send_header('Accept-Ranges', 'bytes')
+        if status == 206:
+            request.send_header('Content-Range', f"bytes {start}-{end}/{len(body)}")
+        if compress:
+            request.send_header('Content-Encoding', 'gzip')
+        request.send_header('Content-Length', str(len(payload)))
+        request.end_headers()
+        if head:
+            return
+        self.send_throttled(request.wfile, payload)
+
+    def send_throttled(self, wfile, payload: bytes) -> None:
+        if not self.bandwidth:
+            wfile.write(payload)
+            return
+        chunk = max(16 * 1024, self.bandwidth // 20)
+        started = time.monotonic()
+        for offset in range(0, len(payload), chunk):
+            wfile.write(payload[offset:offset + chunk])
+            ahead = (offset + chunk) / self.bandwidth - (time.monotonic() - started)
+            if ahead > 0:
+                time.sleep(ahead)
+
+class ServerProcess:
+    """A FakeRepositoryServer running in a child process.
+
+    Keeps the server's allocations (payload slices, socket buffers) out of
+    the peak memory that tracemalloc measures for main.py. The child exits
+    when its stdin is closed.
+    """
+    def __init__(self, latency: float = 0.0, bandwidth: int = 0):
+        self.args = [sys.executable, os.path.abspath(__file__), '--serve', str(latency), str(bandwidth)]
+        self.process = None
+        self.url = None
+
+    def __enter__(self) -> 'ServerProcess':
+        import subprocess
+        self.process = subprocess.Popen(self.args, stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True)
+        self.url = self.process.stdout.readline().strip()
+        if not self.url:
+            self.process.wait()
+            raise RuntimeError("the fake repository server failed to start")
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.process.stdin.close()
+        self.process.wait()
+
+def serve(args: List[str]) -> int:
+    """Run a FakeRepositoryServer for a parent benchmark, printing its URL, until stdin closes."""
+    latency, bandwidth = float(args[0]), int(args[1])
+    with FakeRepositoryServer(latency, bandwidth) as server:
+        print(server.url, flush=True)
+        sys.stdin.read()
+    return 0
+
+# Measurement
+def measure(fn: Callable[[], object], repeat: int, setup: Optional[Callable[[], None]] = None) -> Dict:
+    """Time `fn` over `repeat` runs, then run it once more under tracemalloc for its peak memory."""
+    runs = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        with quiet():
+            started = time.perf_counter()
+            fn()
+            runs.append(time.perf_counter() - started)
+    if setup:
+        setup()
+    tracemalloc.start()
+    try:
+        with quiet():
+            fn()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return {'seconds': statistics.median(runs), 'min_seconds': min(runs), 'runs': runs, 'peak_bytes': peak}
+
+@contextlib.contextmanager
+def quiet():
+    """Swallow everything main.py prints while a benchmark runs."""
+    with contextlib.redirect_stdout(io.StringIO()):
+        yield
+
+def use_repositories(urls: List[str]) -> None:
+    """Point main.py at a fresh set of repositories with an empty cache."""
+    with open(os.path.join(WORK_DIR, 'repositories.json'), 'w') as f:
+        json.dump([{'name': f"bench{i}", 'url': url, 'enabled': True} for i, url in enumerate(urls)], f)
+    clear_catalog_cache()
+
+def clear_catalog_cache() -> None:
+    shutil.rmtree(main.CATALOG_CACHE_DIR, ignore_errors=True)
+    main.get_catalog().invalidate()
+
+def bench_catalog(server: ServerProcess, count: int, repeat: int) -> Dict[str, Dict]:
+    """Catalog load (cold, revalidated, snapshot), listing and search for a catalog size."""
+    results = {}
+    use_repositories([f"{server.url}/catalog/{count}.json"])
+
+    results[f"catalog_load_cold[{count}]"] = measure(lambda: main.load_apps(), repeat, setup=clear_catalog_cache)
+
+    # Stale cache: conditional requests answered with 304
+    results[f"catalog_load_revalidate[{count}]"] = measure(lambda: main.load_apps(refresh=True), repeat)
+
+    main.Catalog().load()  # writes the snapshot
+    results[f"catalog_load_snapshot[{count}]"] = measure(lambda: main.Catalog().load(), repeat)
+
+    catalog = main.Catalog()
+    catalog.load()
+    results[f"listing[{count}]"] = measure(lambda: main.display_apps(catalog), repeat)
+
+    results[f"search_index_build[{count}]"] = measure(lambda: main.SearchIndex.build(catalog.apps), repeat)
+    catalog.search('warm up')
+    for query in SEARCH_QUERIES:
+        results[f"search[{count}][{query}]"] = measure(lambda: catalog.search(query), repeat)
+    return results
+
+def bench_downloads(server: ServerProcess, payload: int, repeat: int) -> Dict[str, Dict]:
+    """Download throughput over one stream, several segments and a redirect chain."""
+    results = {}
+    target = os.path.join(WORK_DIR, 'downloads', 'payload.dmg')
+
+    def clean():
+        shutil.rmtree(os.path.dirname(target), ignore_errors=True)
+
+    cases = {
+        'download_stream': (f"{server.url}/files/{payload}.bin", 1),
+        'download_segmented': (f"{server.url}/files/{payload}.bin", 4),
+        'download_redirect': (f"{server.url}/redirect/3/files/{payload}.bin", 1),
+    }
+    for name, (url, segments) in cases.items():
+        def download(url=url, segments=segments):
+            if not main.download_file(url, target, 'payload', segments=segments, show_status=False):
+                raise RuntimeError(f"download of {url} failed")
+        result = measure(download, repeat, setup=clean)
+        result['bytes'] = payload
+        result['bytes_per_second'] = payload / result['seconds']
+        results[f"{name}[{format_size(payload)}]"] = result
+    clean()
+    return results
+
+def bench_install(server: ServerProcess, payload: int, repeat: int) -> Dict[str, Dict]:
+    """Mount/unmount cycles and the download-and-mount pipeline, using the fake mount backend."""
+    results = {}
+    target = os.path.join(WORK_DIR, 'downloads', 'payload.dmg')
+    url = f"{server.url}/files/{payload}.bin"
+    backend = main.get_mount_backend()
+
+    def clean():
+        shutil.rmtree(os.path.dirname(target), ignore_errors=True)
+
+    def mount():
+        with quiet():
+            mount_point = main.mount_dmg(target, 'payload')
+        if not mount_point or not backend.detach(mount_point):
+            raise RuntimeError(f"mounting {target} failed")
+
+    def install():
+        if not main.download_file(url, target, 'payload', show_status=False):
+            raise RuntimeError(f"download of {url} failed")
+        mount()
+
+    clean()
+    with quiet():
+        main.download_file(url, target, 'payload', show_status=False)
+    results['mount_cycle'] = measure(mount, repeat)
+    results[f"install_pipeline[{format_size(payload)}]"] = measure(install, repeat, setup=clean)
+    clean()
+    return results
+
+# Reporting
+def compare(results: Dict[str, Dict], baseline: Dict[str, Dict], threshold: float) -> bool:
+    """Print every benchmark next to its baseline; return False if any regressed."""
+    ok = True
+    color_print(f"\n{'benchmark':<48} {'baseline':>10} {'current':>10} {'change':>8}  {'peak memory':>12}", Colors.BOLD)
+    for name, result in results.items():
+        before = baseline.get(name)
+        current = f"{result['seconds'] * 1000:.2f}ms"
+        memory = format_size(result['peak_bytes'])
+        if before is None:
+            color_print(f"{name:<48} {'-':>10} {current:>10} {'new':>8}  {memory:>12}")
+            continue
+        change = (result['seconds'] - before['seconds']) / before['seconds'] * 100 if before['seconds'] else 0.0
+        color = ''
+        if change > threshold:
+            color = Colors.RED
+            ok = False
+        elif change < -threshold:
+            color = Colors.GREEN
+        color_print(f"{name:<48} {before['seconds'] * 1000:>8.2f}ms {current:>10} {change:>+7.1f}%  {memory:>12}", color)
+    return ok
+
+def print_results(results: Dict[str, Dict]) -> None:
+    color_print(f"\n{'benchmark':<48} {'median':>10} {'min':>10}  {'peak memory':>12}", Colors.BOLD)
+    for name, result in results.items():
+        line = f"{name:<48} {result['seconds'] * 1000:>8.2f}ms {result['min_seconds'] * 1000:>8.2f}ms  {format_size(result['peak_bytes']):>12}"
+        if 'bytes_per_second' in result:
+            line += f"  {format_size(result['bytes_per_second'])}/s"
+        color_print(line)
+
+def print_usage() -> None:
+    color_print("\nUsage:", Colors.CYAN + Colors.BOLD)
+    color_print("  python bench.py [options]\n")
+    color_print("Options:", Colors.YELLOW)
+    color_print("  --sizes <n,n,...>        Catalog sizes in apps (default: 10,1000,10000; up to 100000)")
+    color_print("  --payload <size>         Download payload size, e.g. 32M (default: 32M)")
+    color_print("  --latency <ms>           Delay added by the server before each response")
+    color_print("  --bandwidth <rate>       Per-connection server bandwidth, e.g. 50M")
+    color_print("  --repeat <n>             Timed runs per benchmark (default: 3)")
+    color_print("  --only <catalog|downloads|install>")
+    color_print("                           Run one group of benchmarks")
+    color_print("  --output <file>          Write the results as JSON")
+    color_print("  --baseline <file>        Compare with the results of an earlier run")
+    color_print("  --threshold <percent>    Slowdown that counts as a regression (default: 10)\n")
+
+def run(args: List[str]) -> int:
+    sizes = pop_option(args, '--sizes')
+    payload = pop_option(args, '--payload')
+    latency = pop_option(args, '--latency')
+    bandwidth = pop_option(args, '--bandwidth')
+    repeat = pop_option(args, '--repeat')
+    only = pop_option(args, '--only')
+    output = pop_option(args, '--output')
+    baseline_path = pop_option(args, '--baseline')
+    threshold = pop_option(args, '--threshold')
+    if len(args) > 1:
+        print_usage()
+        return 2
+
+    sizes = [int(size) for size in sizes.split(',')] if sizes else DEFAULT_SIZES
+    payload = parse_rate(payload or DEFAULT_PAYLOAD)
+    repeat = int(repeat) if repeat else DEFAULT_REPEAT
+    threshold = float(threshold) if threshold else DEFAULT_THRESHOLD
+    options = {
+        'sizes': sizes,
+        'payload': payload,
+        'latency_ms': float(latency or 0),
+        'bandwidth': parse_rate(bandwidth) if bandwidth else 0,
+        'repeat': repeat,
+    }
+
+    os.makedirs(os.environ['ZORTOSHUB_APP_DIRS'], exist_ok=True)
+    os.chdir(WORK_DIR)
+    results = {}
+    with ServerProcess(options['latency_ms'] / 1000, options['bandwidth']) as server:
+        if only in (None, 'catalog'):
+            for count in sizes:
+                color_print(f"⏱  Catalog of {count} apps...", Colors.CYAN)
+                results.update(bench_catalog(server, count, repeat))
+        if only in (None, 'downloads'):
+            color_print(f"⏱  Downloads of {format_size(payload)}...", Colors.CYAN)
+            results.update(bench_downloads(server, payload, repeat))
+        if only in (None, 'install'):
+            color_print("⏱  Installs...", Colors.CYAN)
+            results.update(bench_install(server, payload, repeat))
+
+    report = {
+        'meta': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+            'options': options,
+        },
+        'results': results,
+    }
+    if output:
+        with open(output, 'w') as f:
+            json.dump(report, f, indent=4)
+        color_print(f"✨ Results written to {output}", Colors.GREEN)
+
+    if baseline_path:
+        with open(baseline_path, 'r') as f:
+            baseline = json.load(f)
+        if baseline.get('meta', {}).get('options') != options:
+            color_print("Warning: the baseline was recorded with different options", Colors.YELLOW)
+        return 0 if compare(results, baseline.get('results', {}), threshold) else 1
+    print_results(results)
+    return 0
+
+if __name__ == "__main__":
+    try:
+        original_dir = os.getcwd()
+        args = list(sys.argv)
+        if args[1:2] == ['--serve']:
+            sys.exit(serve(args[2:]))
+        # Output paths are relative to where the benchmark was started
+        for option in ('--output', '--baseline'):
+            if option in args[:-1]:
+                index = args.index(option) + 1
+                args[index] = os.path.join(original_dir, args[index])
+        if 'help' in args[1:] or '--help' in args[1:]:
+            print_usage()
+            sys.exit(0)
+        sys.exit(run(args))
+    except KeyboardInterrupt:
+        color_print("\n\nExiting...", Colors.YELLOW)
+        sys.exit(1)
+    finally:
+        shutil.rmtree(WORK_DIR, ignore_errors=True)
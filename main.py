@@ -4,9 +4,20 @@ import os
 import sys
 import json
 import time
-import urllib.request
-import urllib.error
-from typing import Dict, List, Tuple, Optional
+import hashlib
+import bisect
+import re
+import codecs
+import threading
+import contextlib
+import collections
+import heapq
+import itertools
+import io
+import contextvars
+# Network, TLS, plist and thread pool modules are imported where they are
+# used, so commands answered from the catalog snapshot start quickly
+from typing import Callable, Dict, Iterator, List, Tuple, Optional, Union
 
 class Colors:
     HEADER = '\033[95m'
@@ -20,35 +31,1468 @@ class Colors:
 
 def color_print(text: str, color: str = '', end: str = '\n') -> None:
     """Print colored text using ANSI escape codes."""
+    if _progress is not None and _progress.active:
+        # Print above the live progress lines instead of through them
+        _progress.write(f"{color}{text}{Colors.RESET}{end}")
+        return
     print(f"{color}{text}{Colors.RESET}", end=end)
 
-def load_apps() -> Dict:
-    """Load apps from all enabled repositories."""
-    all_apps = {}
-    repositories = load_repositories()
+# Instrumentation
+#
+# Catalog loading, downloads and installs are broken into spans (DNS, TLS,
+# time to first byte, transfer, mount steps, ...) with byte and retry
+# counters. Nothing is recorded unless --profile or --trace is given; span()
+# then returns a shared no-op, so the hot paths pay one attribute check.
+PROFILE = os.environ.get('ZORTOSHUB_PROFILE', '') not in ('', '0')  # print a timing summary on exit
+TRACE_FILE = os.environ.get('ZORTOSHUB_TRACE', '')  # write spans here on exit: *.jsonl for JSON lines, else Chrome trace
+MAX_TRACE_SPANS = 100000  # spans kept for the trace file; the summary counts all of them
+
+class Span:
+    """A timed phase. Counters added with add() are summed per span name in the summary."""
+    __slots__ = ('tracer', 'name', 'attrs', 'counts', 'start', 'end', 'thread', 'thread_name')
+
+    def __init__(self, tracer: 'Tracer', name: str, attrs: Dict):
+        self.tracer = tracer
+        self.name = name
+        self.attrs = attrs
+        self.counts = {}
+
+    def add(self, counter: str, n: int = 1) -> None:
+        self.counts[counter] = self.counts.get(counter, 0) + n
+
+    def set(self, **attrs) -> None:
+        self.attrs.update(attrs)
+
+    def __enter__(self) -> 'Span':
+        thread = threading.current_thread()
+        self.thread, self.thread_name = thread.ident, thread.name
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.end = time.perf_counter()
+        if exc_type is not None:
+            self.attrs['error'] = exc_type.__name__
+        self.tracer.record(self)
+
+class NullSpan:
+    """Stand-in for Span while instrumentation is off."""
+    __slots__ = ()
+
+    def add(self, counter: str, n: int = 1) -> None:
+        pass
+
+    def set(self, **attrs) -> None:
+        pass
+
+    def __enter__(self) -> 'NullSpan':
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        pass
+
+_NULL_SPAN = NullSpan()
+
+def format_duration(seconds: float) -> str:
+    """Format a duration for display."""
+    if seconds < 1:
+        return f"{seconds * 1000:.1f}ms"
+    return f"{seconds:.2f}s"
+
+class Tracer:
+    """Collects spans and counters for the --profile summary and --trace export."""
+    def __init__(self, profile: bool = False, trace_file: str = ''):
+        self.profile = profile
+        self.trace_file = trace_file
+        self.enabled = profile or bool(trace_file)
+        self.origin = time.perf_counter()
+        self.spans = []
+        self.dropped = 0
+        self.totals = {}
+        self.counters = collections.Counter()
+        self._lock = threading.Lock()
+
+    def span(self, name: str, **attrs) -> Union[Span, NullSpan]:
+        return Span(self, name, attrs) if self.enabled else _NULL_SPAN
+
+    def count(self, name: str, n: int = 1) -> None:
+        if self.enabled:
+            with self._lock:
+                self.counters[name] += n
+
+    def record(self, span: Span) -> None:
+        duration = span.end - span.start
+        with self._lock:
+            total = self.totals.get(span.name)
+            if total is None:
+                total = self.totals[span.name] = [0, 0.0, 0.0, collections.Counter()]
+            total[0] += 1
+            total[1] += duration
+            total[2] = max(total[2], duration)
+            total[3].update(span.counts)
+            if self.trace_file:
+                if len(self.spans) < MAX_TRACE_SPANS:
+                    self.spans.append(span)
+                else:
+                    self.dropped += 1
+
+    def print_summary(self) -> None:
+        """Print per-phase call counts, times and counters, slowest phase first."""
+        with self._lock:
+            totals = sorted(self.totals.items(), key=lambda item: -item[1][1])
+            counters = dict(self.counters)
+        color_print(f"\n⏱  Profile ({format_duration(time.perf_counter() - self.origin)} total)", Colors.CYAN + Colors.BOLD)
+        color_print(f"  {'Phase':<26} {'Calls':>6} {'Total':>10} {'Mean':>10} {'Max':>10}  Counters", Colors.YELLOW)
+        for name, (calls, elapsed, longest, counts) in totals:
+            details = []
+            for counter, value in sorted(counts.items()):
+                if counter == 'bytes':
+                    rate = f", {format_size(value / elapsed)}/s" if elapsed else ''
+                    details.append(f"{format_size(value)}{rate}")
+                else:
+                    details.append(f"{counter}={value}")
+            color_print(f"  {name:<26} {calls:>6} {format_duration(elapsed):>10} "
+                        f"{format_duration(elapsed / calls):>10} {format_duration(longest):>10}  {', '.join(details)}")
+        if counters:
+            color_print("  " + ', '.join(f"{name}={value}" for name, value in sorted(counters.items())))
+
+    def export(self, path: str) -> None:
+        """Write recorded spans as JSON lines (*.jsonl) or a Chrome trace (chrome://tracing, Perfetto)."""
+        with self._lock:
+            spans = list(self.spans)
+            counters = dict(self.counters)
+        pid = os.getpid()
+        with open(path, 'w') as f:
+            if path.endswith('.jsonl'):
+                for span in spans:
+                    record = {'name': span.name, 'start': round(span.start - self.origin, 6),
+                              'duration': round(span.end - span.start, 6), 'thread': span.thread_name}
+                    record.update(span.attrs)
+                    record.update(span.counts)
+                    f.write(json.dumps(record, default=str) + '\n')
+                f.write(json.dumps({'counters': counters, 'dropped_spans': self.dropped}) + '\n')
+                return
+            events = []
+            threads = {}
+            for span in spans:
+                threads[span.thread] = span.thread_name
+                events.append({
+                    'name': span.name, 'cat': span.name.split('.')[0], 'ph': 'X', 'pid': pid, 'tid': span.thread,
+                    'ts': round((span.start - self.origin) * 1e6, 1), 'dur': round((span.end - span.start) * 1e6, 1),
+                    'args': dict(span.attrs, **span.counts),
+                })
+            for thread, name in threads.items():
+                events.append({'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': thread, 'args': {'name': name}})
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms',
+                       'otherData': {'counters': counters, 'dropped_spans': self.dropped}}, f, default=str)
+
+    def finish(self) -> None:
+        """Print the summary and write the trace file, as configured."""
+        if self.profile:
+            self.print_summary()
+        if self.trace_file:
+            try:
+                self.export(self.trace_file)
+                color_print(f"Trace written to {self.trace_file}", Colors.GREEN)
+            except OSError as e:
+                color_print(f"Error writing trace: {str(e)}", Colors.RED)
+
+_tracer = Tracer(PROFILE, TRACE_FILE)
+
+def span(name: str, **attrs) -> Union[Span, NullSpan]:
+    """Return a context manager timing the phase `name` (a no-op unless instrumentation is on)."""
+    return _tracer.span(name, **attrs)
+
+def count_event(name: str, n: int = 1) -> None:
+    """Increment a process-wide counter such as retries or redirects."""
+    _tracer.count(name, n)
+
+# HTTP client
+HTTP_TIMEOUT = 15  # seconds per socket operation
+MAX_IDLE_CONNECTIONS = 8  # kept-alive connections per host
+MAX_HOST_CONNECTIONS = int(os.environ.get('ZORTOSHUB_MAX_HOST_CONNECTIONS', 6))  # in-flight requests per host
+MAX_REDIRECTS = 5
+SLOT_POLL_INTERVAL = 0.1  # seconds between cancellation checks while waiting for a connection slot
+MAX_WORKER_THREADS = 32  # threads running blocking transfers for the async core
+OFFLINE = os.environ.get('ZORTOSHUB_OFFLINE', '') not in ('', '0')  # never touch the network
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0',
+    'Accept': '*/*',
+    'Connection': 'keep-alive',
+}
+
+class HTTPResponse:
+    """Response from HTTPClient.
     
-    for repo in repositories:
-        if not repo.enabled:
-            continue
-            
+    Reads are transparently gunzipped when the server compressed the body.
+    Closing a fully read response returns its connection to the pool.
+    """
+    def __init__(self, client: 'HTTPClient', key: Tuple, conn: 'http.client.HTTPConnection',
+                 response: 'http.client.HTTPResponse', url: str):
+        self._client = client
+        self._key = key
+        self._conn = conn
+        self._response = response
+        self.url = url
+        self.status = response.status
+        self.reason = response.reason
+        self.headers = response.headers
+        self._decoder = None
+        if (self.headers.get('Content-Encoding') or '').lower() in ('gzip', 'x-gzip'):
+            import zlib
+            self._decoder = zlib.decompressobj(16 + zlib.MAX_WBITS)
+
+    def read(self, amt: Optional[int] = None) -> bytes:
+        if self._decoder is None:
+            return self._response.read(amt)
+        if amt is None:
+            return self._decoder.decompress(self._response.read()) + self._decoder.flush()
+        while True:
+            raw = self._response.read(amt)
+            if not raw:
+                return self._decoder.flush()
+            data = self._decoder.decompress(raw)
+            if data:
+                return data
+
+    def close(self) -> None:
+        if self._conn is None:
+            return
+        reusable = self._response.isclosed() and not self._response.will_close
+        self._response.close()
+        self._client._release(self._key, self._conn, reusable)
+        self._conn = None
+
+    def __enter__(self) -> 'HTTPResponse':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+class HTTPClient:
+    """Small HTTP/1.1 client with per-host keep-alive connection pooling.
+    
+    Catalog and download requests to the same host reuse TCP/TLS sessions,
+    timeouts are set per request instead of process-wide, and redirects are
+    followed. At most `max_per_host` requests to a host are in flight at
+    once; further requests wait for a free connection. Non-2xx responses
+    raise urllib.error.HTTPError and connection failures raise
+    urllib.error.URLError, like urllib.request.urlopen.
+    """
+    def __init__(self, timeout: float = HTTP_TIMEOUT, max_idle: int = MAX_IDLE_CONNECTIONS,
+                 max_per_host: int = MAX_HOST_CONNECTIONS):
+        self.timeout = timeout
+        self.max_idle = max_idle
+        self.max_per_host = max_per_host
+        self._idle = {}
+        self._slots = {}
+        self._lock = threading.Lock()
+        import ssl
+        self._ssl_context = ssl.create_default_context()
+
+    def _proxy(self, scheme: str, host: str) -> Optional['urllib.parse.SplitResult']:
+        import urllib.parse
+        import urllib.request
+        proxy = urllib.request.getproxies().get(scheme)
+        if not proxy or urllib.request.proxy_bypass(host):
+            return None
+        return urllib.parse.urlsplit(proxy if '://' in proxy else f"http://{proxy}")
+
+    def _connect(self, key: Tuple) -> 'http.client.HTTPConnection':
+        import http.client
+        scheme, host, port = key
+        proxy = self._proxy(scheme, host)
+        if proxy is None:
+            if scheme == 'https':
+                return http.client.HTTPSConnection(host, port, context=self._ssl_context)
+            return http.client.HTTPConnection(host, port)
+        if scheme == 'https':
+            conn = http.client.HTTPSConnection(proxy.hostname, proxy.port or 8080, context=self._ssl_context)
+            conn.set_tunnel(host, port)
+            return conn
+        return http.client.HTTPConnection(proxy.hostname, proxy.port or 8080)
+
+    def _open(self, conn: 'http.client.HTTPConnection', key: Tuple) -> None:
+        """Connect a direct connection step by step so DNS, TCP and TLS are timed separately."""
+        import socket
+        scheme, host, port = key
+        with span('http.dns', host=host):
+            addresses = socket.getaddrinfo(host, port, 0, socket.SOCK_STREAM)
+        with span('http.tcp', host=host):
+            for index, (family, kind, proto, _, address) in enumerate(addresses):
+                sock = socket.socket(family, kind, proto)
+                try:
+                    sock.settimeout(conn.timeout)
+                    sock.connect(address)
+                    break
+                except OSError:
+                    sock.close()
+                    if index == len(addresses) - 1:
+                        raise
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        if scheme == 'https':
+            try:
+                with span('http.tls', host=host):
+                    sock = self._ssl_context.wrap_socket(sock, server_hostname=host)
+            except Exception:
+                sock.close()
+                raise
+        conn.sock = sock
+
+    def _acquire(self, key: Tuple) -> Tuple['http.client.HTTPConnection', bool]:
+        """Take a connection slot for a host, waiting until one is free.
+        
+        Queueing isn't a network failure, so there is no deadline; the wait
+        ends early with TransferCancelled once the operation is cancelled.
+        """
+        with self._lock:
+            slots = self._slots.get(key)
+            if slots is None:
+                slots = self._slots[key] = threading.BoundedSemaphore(self.max_per_host)
+        while not slots.acquire(timeout=SLOT_POLL_INTERVAL):
+            check_cancelled()
+        with self._lock:
+            idle = self._idle.get(key)
+            if idle:
+                return idle.pop(), True
         try:
-            if repo.url.startswith(('http://', 'https://')):
-                with urllib.request.urlopen(repo.url) as response:
-                    repo_apps = json.loads(response.read().decode())
-            else:
-                with open(repo.url, 'r') as f:
-                    repo_apps = json.load(f)
-                    
-            # Add repository information to each app
-            for app_id, app_data in repo_apps.items():
-                app_data['repository'] = repo.name
-                all_apps[app_id] = app_data
-                
+            return self._connect(key), False
+        except Exception:
+            slots.release()
+            raise
+
+    def _release(self, key: Tuple, conn: 'http.client.HTTPConnection', reusable: bool) -> None:
+        try:
+            if reusable:
+                with self._lock:
+                    idle = self._idle.setdefault(key, [])
+                    if len(idle) < self.max_idle:
+                        idle.append(conn)
+                        return
+            conn.close()
+        finally:
+            self._slots[key].release()
+
+    def close(self) -> None:
+        """Close every idle connection."""
+        with self._lock:
+            idle, self._idle = self._idle, {}
+        for conns in idle.values():
+            for conn in conns:
+                conn.close()
+
+    def request(self, url: str, headers: Optional[Dict] = None, method: str = 'GET',
+                timeout: Optional[float] = None, compressed: bool = False) -> HTTPResponse:
+        """Send a request and return the response, following redirects.
+        
+        Set `compressed` to ask for a gzip-encoded body (decoded on read);
+        downloads leave it off so byte ranges refer to the file itself.
+        """
+        import urllib.error
+        import urllib.parse
+        if OFFLINE:
+            raise urllib.error.URLError("offline mode, network access is disabled")
+        request_headers = dict(DEFAULT_HEADERS)
+        if compressed:
+            request_headers['Accept-Encoding'] = 'gzip'
+        request_headers.update(headers or {})
+        timeout = self.timeout if timeout is None else timeout
+        visited = set()
+        
+        for _ in range(MAX_REDIRECTS + 1):
+            visited.add(url)
+            response = self._send(url, method, request_headers, timeout)
+            location = response.headers.get('Location')
+            if response.status in (301, 302, 303, 307, 308) and location:
+                response.read()
+                response.close()
+                url = urllib.parse.urljoin(url, location)
+                if url in visited:
+                    raise urllib.error.URLError(f"redirect loop at {url}")
+                count_event('http.redirects')
+                if response.status == 303:
+                    method = 'GET'
+                continue
+            if not 200 <= response.status < 300:
+                body = response.read()
+                response.close()
+                raise urllib.error.HTTPError(url, response.status, response.reason, response.headers, io.BytesIO(body))
+            return response
+        raise urllib.error.URLError(f"too many redirects ({MAX_REDIRECTS})")
+
+    def _send(self, url: str, method: str, headers: Dict, timeout: float) -> HTTPResponse:
+        import http.client
+        import urllib.error
+        import urllib.parse
+        parts = urllib.parse.urlsplit(url)
+        scheme = parts.scheme.lower()
+        if scheme not in ('http', 'https'):
+            raise urllib.error.URLError(f"unsupported URL scheme: {scheme}")
+        key = (scheme, parts.hostname, parts.port or (443 if scheme == 'https' else 80))
+        target = parts.path or '/'
+        if parts.query:
+            target += '?' + parts.query
+        if scheme == 'http' and self._proxy(scheme, parts.hostname):
+            target = url
+        
+        while True:
+            conn, reused = self._acquire(key)
+            conn.timeout = timeout
+            if conn.sock is not None:
+                conn.sock.settimeout(timeout)
+            try:
+                if not reused and _tracer.enabled and (conn.host, conn.port) == key[1:]:
+                    self._open(conn, key)
+                with span('http.ttfb', host=key[1], method=method, reused=reused) as request_span:
+                    conn.request(method, target, headers=headers)
+                    response = conn.getresponse()
+                    request_span.set(status=response.status)
+                return HTTPResponse(self, key, conn, response, url)
+            except (http.client.HTTPException, OSError) as e:
+                self._release(key, conn, False)
+                # An idle connection may have been closed by the server; retry on a fresh one
+                if reused and isinstance(e, (http.client.RemoteDisconnected, ConnectionError)):
+                    count_event('http.retries')
+                    continue
+                if isinstance(e, http.client.HTTPException):
+                    raise
+                raise urllib.error.URLError(e)
+
+_http_client = None
+_http_client_lock = threading.Lock()
+
+def get_http_client() -> HTTPClient:
+    """Return the HTTP client shared by catalog and download requests."""
+    global _http_client
+    with _http_client_lock:
+        if _http_client is None:
+            _http_client = HTTPClient()
+    return _http_client
+
+# Async core
+#
+# Network operations are coroutines driven by asyncio. The blocking HTTP
+# client stays the transport: each transfer runs in a worker thread and
+# checks its cancel event between blocks, so cancelling the task (a timeout,
+# Ctrl-C) stops the transfer at the next block with its journal written and
+# its partial file kept for resuming. CLI commands call the coroutines
+# through run_sync.
+class TransferCancelled(Exception):
+    """Raised inside a worker thread once the task it runs for was cancelled."""
+
+_cancel_event = contextvars.ContextVar('cancel_event', default=None)
+
+def current_cancel_event() -> Optional[threading.Event]:
+    """Return the cancel event of the operation running in this thread."""
+    return _cancel_event.get()
+
+def check_cancelled(event: Optional[threading.Event] = None) -> None:
+    """Raise TransferCancelled if the operation running in this thread was cancelled."""
+    event = event or _cancel_event.get()
+    if event is not None and event.is_set():
+        raise TransferCancelled()
+
+async def run_blocking(fn, *args, wait: bool = True):
+    """Run blocking I/O in a worker thread and await its result.
+    
+    If the awaiting task is cancelled, the thread's cancel event is set and,
+    with `wait`, the task waits for the thread to reach its next checkpoint
+    before the cancellation propagates, so no transfer outlives its task.
+    """
+    import asyncio
+    event = threading.Event()
+    
+    def call():
+        token = _cancel_event.set(event)
+        try:
+            return fn(*args)
+        finally:
+            _cancel_event.reset(token)
+    
+    future = asyncio.get_running_loop().run_in_executor(None, call)
+    try:
+        return await asyncio.shield(future)
+    except asyncio.CancelledError:
+        event.set()
+        if wait:
+            try:
+                await future
+            except Exception:
+                pass
+        else:
+            # Nobody awaits the abandoned call; consume its TransferCancelled
+            future.add_done_callback(lambda done: done.cancelled() or done.exception())
+        raise
+
+async def run_interactive(fn, *args):
+    """Run a blocking step that may wait for the user in a daemon thread.
+    
+    The event loop keeps scheduling transfers meanwhile. Unlike run_blocking,
+    a cancelled task doesn't wait for the step, which may be stuck at a
+    prompt; the daemon thread doesn't keep the process alive either.
+    """
+    import asyncio
+    loop = asyncio.get_running_loop()
+    future = loop.create_future()
+    
+    def settle(result, error) -> None:
+        if future.done():
+            return
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+    
+    def call():
+        result, error = None, None
+        try:
+            result = fn(*args)
+        except BaseException as e:
+            error = e
+        try:
+            loop.call_soon_threadsafe(settle, result, error)
+        except RuntimeError:
+            pass  # the loop has already been closed
+    
+    threading.Thread(target=call, name='interactive', daemon=True).start()
+    return await future
+
+def run_sync(coro):
+    """Run a coroutine to completion from synchronous code.
+    
+    Whatever is still running when the coroutine ends (for instance on
+    Ctrl-C, which is raised wherever the main thread happens to be) is
+    cancelled and allowed to clean up before the exception propagates.
+    """
+    import asyncio
+    from concurrent.futures import ThreadPoolExecutor
+    loop = asyncio.new_event_loop()
+    loop.set_default_executor(ThreadPoolExecutor(max_workers=MAX_WORKER_THREADS))
+    asyncio.set_event_loop(loop)
+    try:
+        return loop.run_until_complete(coro)
+    finally:
+        try:
+            tasks = asyncio.all_tasks(loop)
+            for task in tasks:
+                task.cancel()
+            if tasks:
+                loop.run_until_complete(asyncio.gather(*tasks, return_exceptions=True))
+        finally:
+            asyncio.set_event_loop(None)
+            loop.close()
+
+# Repository fetching
+REPOSITORY_TIMEOUT = 15  # seconds allowed per repository fetch
+FALLBACK_GRACE = 0.5  # seconds past the timeout for a fetch to fall back to its cached copy itself
+MAX_REPOSITORY_WORKERS = min(8, MAX_HOST_CONNECTIONS)  # more would only queue for connections to a shared host
+
+# Catalog cache, one entry per repository URL
+CACHE_DIR = os.environ.get('ZORTOSHUB_CACHE_DIR', os.path.expanduser('~/Library/Caches/ZortosHub'))
+CATALOG_CACHE_DIR = os.path.join(CACHE_DIR, 'catalogs')
+CATALOG_TTL = int(os.environ.get('ZORTOSHUB_CATALOG_TTL', 15 * 60))  # seconds before revalidating
+
+def atomic_write(path: str, data: bytes) -> None:
+    """Write a file atomically so readers never see a partial write."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+def catalog_cache_paths(url: str) -> Tuple[str, str]:
+    """Return the body and metadata paths of the cache entry for a repository URL."""
+    key = hashlib.sha256(url.encode()).hexdigest()[:32]
+    base = os.path.join(CATALOG_CACHE_DIR, key)
+    return f"{base}.json", f"{base}.meta.json"
+
+def read_catalog_meta(url: str) -> Dict:
+    """Read the cached validators of a repository URL; empty if it isn't cached."""
+    body_path, meta_path = catalog_cache_paths(url)
+    try:
+        with open(meta_path, 'r') as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return meta if os.path.exists(body_path) else {}
+
+def write_catalog_cache(url: str, body: Optional[bytes], meta: Dict) -> None:
+    """Store a repository body and its validators in the catalog cache."""
+    body_path, meta_path = catalog_cache_paths(url)
+    try:
+        if body is not None:
+            atomic_write(body_path, body)
+        atomic_write(meta_path, json.dumps(dict(meta, url=url)).encode())
+    except OSError as e:
+        color_print(f"Warning: could not write catalog cache: {str(e)}", Colors.YELLOW)
+
+# Sharded repository index format:
+#   {"format": "zortoshub-index", "revision": 7,
+#    "shards": [{"url": "shards/1f2e3d4c.json", "sha256": "...", "size": 1234}, ...]}
+# Each shard is a plain apps.json object; shard URLs are relative to the index.
+# Members may come in any order: apps are JSON objects and index members aren't.
+INDEX_FORMAT = 'zortoshub-index'
+SHARD_CACHE_DIR = os.path.join(CATALOG_CACHE_DIR, 'shards')
+SHARD_PRUNE_GRACE = 10 * 60  # seconds a new shard is kept unreferenced, for fetches still in progress
+
+class StaleIndexError(ValueError):
+    """Raised when a repository index is older than the cached revision."""
+
+def is_repository_index(data: Dict) -> bool:
+    """Check whether a repository document is a sharded index rather than apps."""
+    return data.get('format') == INDEX_FORMAT and isinstance(data.get('shards'), list)
+
+def resolve_url(base: str, ref: str) -> str:
+    """Resolve a URL or path relative to a repository URL or local path."""
+    import urllib.parse
+    if base.startswith(('http://', 'https://')):
+        return urllib.parse.urljoin(base, ref)
+    return os.path.join(os.path.dirname(base), ref)
+
+def fetch_shard(base: str, shard: Dict, timeout: float) -> bytes:
+    """Return the body of an index shard, fetching it only if it isn't cached yet.
+    
+    Shards are cached by SHA-256, so a shard that didn't change between
+    revisions is never transferred again.
+    """
+    sha256 = shard['sha256'].lower()
+    cache_path = os.path.join(SHARD_CACHE_DIR, f"{sha256}.json")
+    try:
+        with open(cache_path, 'rb') as f:
+            return f.read()
+    except OSError:
+        pass
+    
+    url = resolve_url(base, shard['url'])
+    with span('catalog.shard') as shard_span:
+        if url.startswith(('http://', 'https://')):
+            with get_http_client().request(url, timeout=timeout, compressed=True) as response:
+                body = response.read()
+        else:
+            with open(url, 'rb') as f:
+                body = f.read()
+        shard_span.add('bytes', len(body))
+    if hashlib.sha256(body).hexdigest() != sha256:
+        raise ValueError(f"shard '{shard['url']}' failed its integrity check")
+    try:
+        atomic_write(cache_path, body)
+    except OSError:
+        pass
+    return body
+
+def prune_shard_cache() -> None:
+    """Remove cached shards that no cached repository index refers to any more."""
+    referenced = set()
+    try:
+        for name in os.listdir(CATALOG_CACHE_DIR):
+            if name.endswith('.meta.json'):
+                with open(os.path.join(CATALOG_CACHE_DIR, name), 'r') as f:
+                    referenced.update(json.load(f).get('shards') or ())
+        for entry in os.scandir(SHARD_CACHE_DIR):
+            if (entry.name.endswith('.json') and entry.name[:-5] not in referenced
+                    and time.time() - entry.stat().st_mtime >= SHARD_PRUNE_GRACE):
+                os.remove(entry.path)
+    except (OSError, ValueError):
+        pass  # keep everything rather than guess what is still referenced
+
+# Streaming catalog ingestion
+CHUNK_SIZE = 64 * 1024
+_MISSING = object()
+
+class AppRecord:
+    """Compact catalog entry.
+    
+    Records use __slots__, intern their repeated strings and refer to their
+    Repository instead of copying its name into every app. Dict-style access
+    (app['name'], app.get('sha256')) keeps working like the JSON objects.
+    """
+    FIELDS = ('name', 'description', 'url', 'filename', 'category', 'icon', 'status',
+              'version', 'sha256', 'size', 'priority')
+    INTERNED = ('category', 'icon', 'status')
+    __slots__ = ('id',) + FIELDS + ('repo', 'extra')
+
+    def __init__(self, app_id: str, data: Dict, repo: Optional['Repository'] = None):
+        self.id = app_id
+        self.repo = repo
+        for field in self.FIELDS:
+            value = data.pop(field, None)
+            if field in self.INTERNED and isinstance(value, str):
+                value = sys.intern(value)
+            setattr(self, field, value)
+        data.pop('repository', None)
+        self.extra = data or None
+
+    def to_tuple(self) -> Tuple:
+        """Return the record as plain values, for the catalog snapshot."""
+        return (self.id,) + tuple(getattr(self, field) for field in self.FIELDS) + (self.extra,)
+
+    @classmethod
+    def from_tuple(cls, values: Tuple, repo: Optional['Repository']) -> 'AppRecord':
+        record = cls.__new__(cls)
+        record.id, *fields, record.extra = values
+        for field, value in zip(cls.FIELDS, fields):
+            setattr(record, field, value)
+        record.repo = repo
+        return record
+
+    def get(self, key: str, default=None):
+        if key == 'repository':
+            return self.repo.name if self.repo is not None else default
+        if key in self.FIELDS:
+            value = getattr(self, key)
+            return default if value is None else value
+        if self.extra and key in self.extra:
+            return self.extra[key]
+        return default
+
+    def __getitem__(self, key: str):
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def __contains__(self, key: str) -> bool:
+        return self.get(key, _MISSING) is not _MISSING
+
+    def to_dict(self) -> Dict:
+        """Return the app as a plain apps.json object."""
+        data = {field: getattr(self, field) for field in self.FIELDS if getattr(self, field) is not None}
+        data.update(self.extra or {})
+        return data
+
+def iter_json_object(chunks: Iterator[bytes]) -> Iterator[Tuple[str, object]]:
+    """Incrementally parse a JSON object, yielding its members as they arrive.
+    
+    Only the member being parsed is held in memory, so a large catalog can
+    be consumed while it is still downloading.
+    """
+    decoder = json.JSONDecoder()
+    text = codecs.getincrementaldecoder('utf-8')()
+    chunks = iter(chunks)
+    buf, pos, eof = '', 0, False
+    whitespace = re.compile(r'\s*')
+    
+    def more():
+        nonlocal buf, pos, eof
+        if eof:
+            raise ValueError("unexpected end of JSON document")
+        buf, pos = buf[pos:], 0
+        chunk = next(chunks, None)
+        if chunk is None:
+            eof = True
+            buf += text.decode(b'', final=True)
+        else:
+            buf += text.decode(chunk)
+    
+    def next_char() -> str:
+        nonlocal pos
+        while True:
+            pos = whitespace.match(buf, pos).end()
+            if pos < len(buf):
+                return buf[pos]
+            more()
+    
+    def decode_value():
+        nonlocal pos
+        while True:
+            try:
+                value, end = decoder.raw_decode(buf, pos)
+                # A number followed by nothing (or by what looks like more of
+                # it, as in "1." or "2e") may have been cut short
+                if eof or (end < len(buf) and buf[end] not in '0123456789.eE+-'):
+                    pos = end
+                    return value
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+            more()
+    
+    if next_char() != '{':
+        raise ValueError("expected a JSON object")
+    pos += 1
+    if next_char() == '}':
+        return
+    while True:
+        next_char()
+        key = decode_value()
+        if not isinstance(key, str) or next_char() != ':':
+            raise ValueError("malformed JSON object")
+        pos += 1
+        next_char()
+        yield key, decode_value()
+        separator = next_char()
+        pos += 1
+        if separator == '}':
+            return
+        if separator != ',':
+            raise ValueError("malformed JSON object")
+
+def iter_file_chunks(path: str) -> Iterator[bytes]:
+    """Read a file in chunks."""
+    with open(path, 'rb') as f:
+        while True:
+            chunk = f.read(CHUNK_SIZE)
+            if not chunk:
+                return
+            yield chunk
+
+def iter_repository_document(repo: 'Repository', base: str, chunks: Iterator[bytes], timeout: float,
+                             info: Optional[Dict] = None, min_revision: Optional[int] = None,
+                             release: Optional[Callable[[], None]] = None) -> Iterator[Tuple[str, AppRecord]]:
+    """Yield the apps of a repository document, following the shards of an index.
+    
+    The revision and shard hashes of an index are stored in `info`; an
+    index older than `min_revision` raises StaleIndexError. `release` is
+    called once the index has been read and before any shard is fetched,
+    so the response that carried it doesn't hold a connection slot while
+    the shards need one.
+    """
+    entries = iter_json_object(chunks)
+    first = next(entries, None)
+    if first is None:
+        return
+    if not isinstance(first[1], dict):
+        # Every app is an object, so this is an index, whatever its key order
+        index = dict(entries)
+        index[first[0]] = first[1]
+        if not is_repository_index(index):
+            raise ValueError("malformed repository index")
+        revision = index.get('revision')
+        if revision is not None and min_revision is not None and revision < min_revision:
+            raise StaleIndexError(f"server has revision {revision}, older than cached revision {min_revision}")
+        if info is not None:
+            info['revision'] = revision
+            info['shards'] = [shard['sha256'].lower() for shard in index['shards']]
+        if release is not None:
+            release()
+        for shard in index['shards']:
+            for app_id, app in iter_json_object([fetch_shard(base, shard, timeout)]):
+                yield app_id, make_record(app_id, app, repo)
+        return
+    
+    yield first[0], make_record(first[0], first[1], repo)
+    for app_id, app in entries:
+        yield app_id, make_record(app_id, app, repo)
+
+def make_record(app_id: str, app: object, repo: Optional['Repository']) -> AppRecord:
+    """Turn a parsed apps.json entry into an AppRecord."""
+    if not isinstance(app, dict):
+        raise ValueError(f"invalid entry for app '{app_id}'")
+    return AppRecord(app_id, app, repo)
+
+def iter_cached_repository(repo: 'Repository', timeout: float = REPOSITORY_TIMEOUT) -> Iterator[Tuple[str, AppRecord]]:
+    """Yield the apps of the last good copy of a repository."""
+    body_path, _ = catalog_cache_paths(repo.url)
+    return iter_repository_document(repo, repo.url, iter_file_chunks(body_path), timeout)
+
+def iter_repository(repo: 'Repository', timeout: float = REPOSITORY_TIMEOUT, refresh: bool = False,
+                    reload: bool = False) -> Iterator[Tuple[str, AppRecord]]:
+    """Yield `(app_id, AppRecord)` pairs of a repository as they are parsed.
+    
+    Remote repositories are served from the catalog cache while it is
+    fresh, revalidated with ETag/Last-Modified once it is stale (or when
+    `refresh` is set), and fall back to the last good copy when the network
+    fails. Downloaded bodies are parsed while they stream in and written to
+    the cache as they go. In offline mode only the cache is used.
+    Repositories published as a sharded index only transfer the index and
+    the shards that changed. With `reload`, the repository is fetched in
+    full past any HTTP caches, and an index older than the cached one is
+    accepted.
+    """
+    import urllib.error
+    if not repo.url.startswith(('http://', 'https://')):
+        yield from iter_repository_document(repo, repo.url, iter_file_chunks(repo.url), timeout)
+        return
+    
+    meta = read_catalog_meta(repo.url)
+    fresh = not refresh and not reload and time.time() - meta.get('fetched_at', 0) < CATALOG_TTL
+    if meta and (OFFLINE or fresh):
+        yield from iter_cached_repository(repo, timeout)
+        return
+    
+    headers = {}
+    if reload:
+        headers['Cache-Control'] = 'no-cache'
+    else:
+        if meta.get('etag'):
+            headers['If-None-Match'] = meta['etag']
+        if meta.get('last_modified'):
+            headers['If-Modified-Since'] = meta['last_modified']
+    
+    try:
+        response = get_http_client().request(repo.url, headers, timeout=timeout, compressed=True)
+    except Exception as e:
+        if not meta:
+            raise
+        # A fetch abandoned after its timeout has already fallen back elsewhere
+        check_cancelled()
+        if isinstance(e, urllib.error.HTTPError) and e.code == 304:
+            # Not modified: keep the cached body, just record the revalidation
+            write_catalog_cache(repo.url, None, dict(meta, fetched_at=time.time()))
+        else:
+            color_print(f"Warning: using cached copy of repository '{repo.name}' ({str(e)})", Colors.YELLOW)
+        yield from iter_cached_repository(repo, timeout)
+        return
+    
+    # Tee the body into the cache while it is being parsed
+    body_path, _ = catalog_cache_paths(repo.url)
+    tmp_path = f"{body_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        os.makedirs(CATALOG_CACHE_DIR, exist_ok=True)
+        cache_file = open(tmp_path, 'wb')
+    except OSError as e:
+        color_print(f"Warning: could not write catalog cache: {str(e)}", Colors.YELLOW)
+        cache_file = None
+    
+    transfer = span('catalog.transfer', repo=repo.name)
+    
+    def tee() -> Iterator[bytes]:
+        while True:
+            check_cancelled()
+            chunk = response.read(CHUNK_SIZE)
+            if not chunk:
+                return
+            transfer.add('bytes', len(chunk))
+            if cache_file is not None:
+                cache_file.write(chunk)
+            yield chunk
+    
+    info = {}
+    try:
+        with response, transfer:
+            yield from iter_repository_document(repo, repo.url, tee(), timeout, info,
+                                                None if reload else meta.get('revision'), release=response.close)
+        if cache_file is not None:
+            cache_file.close()
+            os.replace(tmp_path, body_path)
+            write_catalog_cache(repo.url, None, {
+                'etag': response.headers.get('ETag'),
+                'last_modified': response.headers.get('Last-Modified'),
+                'revision': info.get('revision'),
+                'shards': info.get('shards'),
+                'fetched_at': time.time(),
+            })
+            if info.get('shards') is not None:
+                prune_shard_cache()
+    finally:
+        if cache_file is not None:
+            cache_file.close()
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+def fetch_repository(repo: 'Repository', timeout: float = REPOSITORY_TIMEOUT, refresh: bool = False) -> Dict:
+    """Fetch and parse the apps of a single repository.
+    
+    See iter_repository; if the repository fails part-way through, the last
+    good copy is used. An index older than the cached copy is reloaded in
+    full, since the repository may have been republished.
+    """
+    with span('catalog.fetch', repo=repo.name) as fetch_span:
+        try:
+            try:
+                apps = dict(iter_repository(repo, timeout, refresh))
+            except StaleIndexError as e:
+                # Perhaps a stale HTTP cache, perhaps a republished repository
+                color_print(f"Warning: reloading repository '{repo.name}' ({str(e)})", Colors.YELLOW)
+                apps = dict(iter_repository(repo, timeout, reload=True))
+        except TransferCancelled:
+            raise
         except Exception as e:
-            color_print(f"Error loading apps from repository '{repo.name}': {str(e)}", Colors.RED)
+            if not repo.url.startswith(('http://', 'https://')) or not read_catalog_meta(repo.url):
+                raise
+            check_cancelled()
+            color_print(f"Warning: using cached copy of repository '{repo.name}' ({str(e)})", Colors.YELLOW)
+            count_event('catalog.fallbacks')
+            apps = dict(iter_cached_repository(repo, timeout))
+        fetch_span.add('apps', len(apps))
+        return apps
+
+def build_repository_index(apps_path: str, output_dir: str) -> bool:
+    """Publish an apps.json as a sharded index (one shard per category).
+    
+    Shards are named after their content hash, and the revision is only
+    bumped when a shard changed, so republishing an unchanged catalog
+    leaves index.json byte-for-byte identical.
+    """
+    try:
+        with open(apps_path, 'r') as f:
+            apps = json.load(f)
+        
+        by_category = {}
+        for app_id, app in sorted(apps.items()):
+            by_category.setdefault(app.get('category', ''), {})[app_id] = app
+        
+        shards = []
+        for category in sorted(by_category):
+            body = json.dumps(by_category[category], indent=4, sort_keys=True).encode()
+            sha256 = hashlib.sha256(body).hexdigest()
+            shard_url = f"shards/{sha256[:16]}.json"
+            atomic_write(os.path.join(output_dir, shard_url), body)
+            shards.append({'url': shard_url, 'sha256': sha256, 'size': len(body)})
+        
+        index_path = os.path.join(output_dir, 'index.json')
+        revision = 1
+        try:
+            with open(index_path, 'r') as f:
+                previous = json.load(f)
+            revision = previous['revision'] + (previous['shards'] != shards)
+        except (OSError, ValueError, KeyError):
+            pass
+        
+        index = {'format': INDEX_FORMAT, 'revision': revision, 'shards': shards}
+        atomic_write(index_path, json.dumps(index, indent=4).encode())
+        
+        # Drop shards no longer referenced by the index
+        referenced = {os.path.basename(shard['url']) for shard in shards}
+        for name in os.listdir(os.path.join(output_dir, 'shards')):
+            if name not in referenced:
+                os.remove(os.path.join(output_dir, 'shards', name))
+        
+        color_print(f"✨ Wrote {index_path} (revision {revision}, {len(shards)} shards)", Colors.GREEN)
+        return True
+    except Exception as e:
+        color_print(f"Error building repository index: {str(e)}", Colors.RED)
+        return False
+
+async def load_apps_async(refresh: bool = False, failed: Optional[List['Repository']] = None) -> Dict[str, AppRecord]:
+    """Load apps from all enabled repositories.
+    
+    Repositories are fetched concurrently (at most MAX_REPOSITORY_WORKERS at
+    a time); a fetch still running REPOSITORY_TIMEOUT seconds after it
+    started is cancelled, stops at its next chunk and falls back to the
+    cached copy if there is one. Time spent queued behind other
+    repositories doesn't count. Set `refresh` to revalidate every cached
+    repository regardless of its TTL. Repositories that couldn't be loaded
+    are appended to `failed`.
+    """
+    import asyncio
+    all_apps = {}
+    repositories = [repo for repo in load_repositories() if repo.enabled]
+    if not repositories:
+        return all_apps
+    
+    workers = asyncio.Semaphore(MAX_REPOSITORY_WORKERS)
+    
+    async def fetch(repo: Repository) -> Dict:
+        async with workers:
+            return await fetch_repository_async(repo, REPOSITORY_TIMEOUT, refresh)
+    
+    tasks = [asyncio.ensure_future(fetch(repo)) for repo in repositories]
+    try:
+        with span('load_apps', repositories=len(repositories)):
+            results = await asyncio.gather(*tasks, return_exceptions=True)
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+    
+    # Merge in configuration order so later repositories override earlier ones
+    for repo, result in zip(repositories, results):
+        if isinstance(result, BaseException):
+            color_print(f"Error loading apps from repository '{repo.name}': {str(result)}", Colors.RED)
+            if failed is not None:
+                failed.append(repo)
+        else:
+            all_apps.update(result)
             
     return all_apps
 
+def load_apps(refresh: bool = False, failed: Optional[List['Repository']] = None) -> Dict[str, AppRecord]:
+    """Synchronous wrapper around load_apps_async."""
+    return run_sync(load_apps_async(refresh, failed))
+
+async def fetch_repository_async(repo: 'Repository', timeout: float = REPOSITORY_TIMEOUT,
+                                 refresh: bool = False) -> Dict:
+    """Fetch a single repository, giving up after `timeout` seconds.
+    
+    A remote repository that times out falls back to its last good copy,
+    like any other network failure (see fetch_repository).
+    """
+    import asyncio
+    # Catalog bodies are swapped into the cache atomically, so a cancelled
+    # fetch doesn't need to be waited for. The grace period lets a fetch
+    # whose socket timed out right at the deadline fall back on its own.
+    try:
+        return await asyncio.wait_for(run_blocking(fetch_repository, repo, timeout, refresh, wait=False),
+                                      timeout + FALLBACK_GRACE)
+    except asyncio.TimeoutError:
+        if not repo.url.startswith(('http://', 'https://')) or not read_catalog_meta(repo.url):
+            raise TimeoutError(f"timed out after {timeout}s") from None
+    color_print(f"Warning: using cached copy of repository '{repo.name}' (timed out after {timeout}s)", Colors.YELLOW)
+    count_event('catalog.fallbacks')
+    return await run_blocking(dict, iter_cached_repository(repo, timeout))
+
+# Search index
+SEARCH_FIELD_WEIGHTS = {'name': 10.0, 'id': 8.0, 'category': 3.0, 'description': 1.0}
+PREFIX_MATCH = 0.7  # score factors relative to an exact token match
+INFIX_MATCH = 0.5
+FUZZY_MATCH = 0.4
+
+def tokenize(text: str) -> List[str]:
+    """Split text into lowercase alphanumeric tokens."""
+    return re.findall(r'[a-z0-9]+', text.lower())
+
+def edit_distance(a: str, b: str, limit: int) -> int:
+    """Levenshtein distance between two strings, capped at `limit + 1`."""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char_a != char_b)))
+        if min(current) > limit:
+            return limit + 1
+        previous = current
+    return previous[-1]
+
+def token_trigrams(token: str) -> set:
+    """Return the trigrams of a token padded with ^ and $, so word edges and short tokens have some too."""
+    padded = f"^{token}$"
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+LONG_TERM = 8  # query tokens this long are matched with up to two typos
+
+class SearchIndex:
+    """Inverted token index over app id, name, description and category.
+    
+    Query tokens match index tokens exactly, by prefix, inside a longer
+    token or with a typo (edit distance 1, or 2 for longer words). Every
+    query token must match, and results are ranked by the field weights
+    of the best matches. Infix and typo matches are looked up through a
+    trigram index of the tokens, stored along with the postings.
+    """
+    def __init__(self, postings: Dict[str, Dict[str, float]], names: Dict[str, str],
+                 grams: Optional[Dict[str, List[int]]] = None):
+        self.postings = postings
+        self.names = names
+        self.tokens = sorted(postings)
+        if grams is None:
+            # Trigram -> positions in self.tokens of the tokens containing it
+            grams = {}
+            for position, token in enumerate(self.tokens):
+                for gram in token_trigrams(token):
+                    grams.setdefault(gram, []).append(position)
+        self.grams = grams
+
+    @classmethod
+    def build(cls, apps: Dict) -> 'SearchIndex':
+        postings = {}
+        names = {}
+        for app_id, app in apps.items():
+            names[app_id] = app['name'].lower()
+            fields = {
+                'name': app['name'],
+                'id': app_id,
+                'category': app.get('category', ''),
+                'description': app.get('description', ''),
+            }
+            for field, text in fields.items():
+                for token in tokenize(text):
+                    weights = postings.setdefault(token, {})
+                    weights[app_id] = max(weights.get(app_id, 0.0), SEARCH_FIELD_WEIGHTS[field])
+        return cls(postings, names)
+
+    def to_dict(self) -> Dict:
+        return {'postings': self.postings, 'names': self.names, 'grams': self.grams}
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'SearchIndex':
+        return cls(data['postings'], data['names'], data['grams'])
+
+    def _infix_tokens(self, term: str) -> List[str]:
+        # A token containing the term contains every trigram of it
+        lists = sorted((self.grams.get(term[i:i + 3], ()) for i in range(len(term) - 2)), key=len)
+        positions = set(lists[0])
+        for other in lists[1:]:
+            if not positions:
+                break
+            positions.intersection_update(other)
+        return [self.tokens[position] for position in positions if term in self.tokens[position]]
+
+    def _fuzzy_tokens(self, term: str) -> List[str]:
+        # Each edit changes at most three trigrams, so a token within `limit`
+        # edits shares all but 3 * limit of the term's trigrams
+        limit = 2 if len(term) >= LONG_TERM else 1
+        grams = token_trigrams(term)
+        counts = collections.Counter()
+        for gram in grams:
+            counts.update(self.grams.get(gram, ()))
+        needed = max(1, len(grams) - 3 * limit)
+        matches = []
+        for position, shared in counts.items():
+            token = self.tokens[position]
+            if (shared >= needed and abs(len(token) - len(term)) <= limit
+                    and edit_distance(term, token, limit) <= limit):
+                matches.append(token)
+        return matches
+
+    def _match(self, term: str) -> Dict[str, float]:
+        scores = {}
+        
+        def add(token, factor):
+            for app_id, weight in self.postings[token].items():
+                scores[app_id] = max(scores.get(app_id, 0.0), weight * factor)
+        
+        if term in self.postings:
+            add(term, 1.0)
+        start = bisect.bisect_right(self.tokens, term)
+        for token in self.tokens[start:]:
+            if not token.startswith(term):
+                break
+            add(token, PREFIX_MATCH)
+        if not scores and len(term) >= 3:
+            for token in self._infix_tokens(term):
+                add(token, INFIX_MATCH)
+        if not scores and len(term) >= 4:
+            for token in self._fuzzy_tokens(term):
+                add(token, FUZZY_MATCH)
+        return scores
+
+    def search(self, query: str) -> List[str]:
+        """Return the IDs of the apps matching every query token, best first."""
+        terms = tokenize(query)
+        if not terms:
+            return []
+        scores = None
+        for term in terms:
+            matches = self._match(term)
+            if scores is None:
+                scores = matches
+            else:
+                scores = {app_id: score + matches[app_id] for app_id, score in scores.items() if app_id in matches}
+            if not scores:
+                return []
+        # Whole-phrase hits in the name rank first
+        phrase = ' '.join(terms)
+        return sorted(scores, key=lambda app_id: (phrase not in self.names[app_id], -scores[app_id], self.names[app_id]))
+
+def search_index_path(version: str) -> str:
+    """Return the path of the stored search index for a catalog version."""
+    return os.path.join(CATALOG_CACHE_DIR, f"search-{version}.json")
+
+def load_search_index(apps: Dict, version: str) -> SearchIndex:
+    """Load the stored search index for a catalog version, building it if needed."""
+    path = search_index_path(version)
+    try:
+        with open(path, 'r') as f:
+            return SearchIndex.from_dict(json.load(f))
+    except (OSError, ValueError, KeyError):
+        pass
+    index = SearchIndex.build(apps)
+    try:
+        atomic_write(path, json.dumps(index.to_dict()).encode())
+        # Indexes of older catalog versions are never used again
+        for name in os.listdir(CATALOG_CACHE_DIR):
+            if name.startswith('search-') and name != os.path.basename(path):
+                os.remove(os.path.join(CATALOG_CACHE_DIR, name))
+    except OSError:
+        pass
+    return index
+
+# Catalog snapshot: the merged, sorted and indexed catalog in one file
+CATALOG_SNAPSHOT = os.path.join(CATALOG_CACHE_DIR, 'snapshot.bin')
+SNAPSHOT_FORMAT = (3,) + tuple(sys.version_info[:2])  # marshal data is specific to the Python version
+
+def catalog_sources(repositories: List['Repository']) -> Optional[List[Tuple]]:
+    """Fingerprint the cached inputs of the merged catalog.
+    
+    Returns None if a remote repository isn't cached, since its apps can't
+    be in a snapshot.
+    """
+    sources = []
+    for repo in repositories:
+        if repo.url.startswith(('http://', 'https://')):
+            path = catalog_cache_paths(repo.url)[1]
+        else:
+            path = repo.url
+        try:
+            st = os.stat(path)
+        except OSError:
+            if repo.url.startswith(('http://', 'https://')):
+                return None
+            st = None
+        sources.append((repo.name, repo.url, st and (st.st_mtime_ns, st.st_size)))
+    return sources
+
+def catalog_fetched_at(repositories: List['Repository']) -> Optional[float]:
+    """Return when the least recently fetched remote repository was fetched, if there is one."""
+    fetched = [read_catalog_meta(repo.url).get('fetched_at', 0) for repo in repositories
+               if repo.url.startswith(('http://', 'https://'))]
+    return min(fetched, default=None)
+
+def read_catalog_snapshot(repositories: List['Repository']) -> Optional[Dict]:
+    """Load the catalog snapshot if it still matches the repositories and their caches.
+    
+    The snapshot expires CATALOG_TTL after its oldest repository was
+    fetched, using the TTL in effect now. An expired snapshot is still used
+    in offline mode.
+    """
+    import marshal
+    sources = catalog_sources(repositories)
+    if sources is None:
+        return None
+    try:
+        with open(CATALOG_SNAPSHOT, 'rb') as f:
+            snapshot = marshal.loads(f.read())
+    except (OSError, EOFError, ValueError, TypeError):
+        return None
+    if not isinstance(snapshot, dict) or snapshot.get('format') != SNAPSHOT_FORMAT:
+        return None
+    if snapshot['sources'] != sources:
+        return None
+    fetched_at = snapshot['fetched_at']
+    if not OFFLINE and fetched_at is not None and time.time() >= fetched_at + CATALOG_TTL:
+        return None
+    return snapshot
+
+def write_catalog_snapshot(repositories: List['Repository'], state: Dict) -> None:
+    """Store the catalog state for the next startup."""
+    import marshal
+    sources = catalog_sources(repositories)
+    if sources is None:
+        return
+    snapshot = dict(state, format=SNAPSHOT_FORMAT, sources=sources,
+                    fetched_at=catalog_fetched_at(repositories))
+    try:
+        atomic_write(CATALOG_SNAPSHOT, marshal.dumps(snapshot))
+    except (OSError, ValueError):
+        pass
+
+class Catalog:
+    """Session-level catalog, loaded once and indexed for menu navigation.
+    
+    The catalog only goes back to the repositories when it is refreshed or
+    invalidated (e.g. after a repository is added or removed). Between runs
+    it is kept as a snapshot, so a warm start is a single file read instead
+    of parsing, merging, sorting and indexing every repository again.
+    """
+    def __init__(self):
+        self._apps = None
+        self._sorted = []
+        self._by_category = {}
+        self._by_repository = {}
+        self._version = None
+        self._search_index = None
+        self._search_blob = None
+
+    def _build(self, apps: Dict, sorted_apps: Optional[List[Tuple[str, Dict]]] = None) -> None:
+        self._apps = apps
+        self._version = None
+        self._search_index = None
+        self._search_blob = None
+        if sorted_apps is None:
+            sorted_apps = sorted(apps.items(), key=lambda x: (x[1]['category'], x[1]['name']))
+        self._sorted = sorted_apps
+        self._by_category = {}
+        self._by_repository = {}
+        for app_id, app in self._sorted:
+            self._by_category.setdefault(app['category'], []).append((app_id, app))
+            self._by_repository.setdefault(app.get('repository'), []).append((app_id, app))
+
+    def load(self, refresh: bool = False) -> None:
+        """(Re)load the catalog from the snapshot or the enabled repositories."""
+        repositories = [repo for repo in load_repositories() if repo.enabled]
+        with span('catalog.snapshot_read'):
+            snapshot = None if refresh else read_catalog_snapshot(repositories)
+            if snapshot is not None:
+                by_name = {repo.name: repo for repo in repositories}
+                apps = {}
+                for repo_name, values in snapshot['apps']:
+                    apps[values[0]] = AppRecord.from_tuple(values, by_name.get(repo_name))
+                # The snapshot is already in display order, no need to sort again
+                self._build(apps, [(app_id, apps[app_id]) for app_id in snapshot['sorted']])
+                self._version = snapshot['version']
+                self._search_blob = snapshot['search_index']
+                return
+        
+        import marshal
+        failed = []
+        apps = load_apps(refresh=refresh, failed=failed)
+        with span('catalog.build', apps=len(apps)):
+            self._build(apps)
+        if not failed:
+            with span('catalog.search_index'):
+                self._search_index = load_search_index(self._apps, self.version)
+            with span('catalog.snapshot_write'):
+                write_catalog_snapshot(repositories, {
+                    'apps': [(app.get('repository'), app.to_tuple()) for app in self._apps.values()],
+                    'sorted': [app_id for app_id, _ in self._sorted],
+                    'version': self.version,
+                    # Nested blob, so listings don't pay for decoding the index
+                    'search_index': marshal.dumps(self._search_index.to_dict()),
+                })
+
+    def refresh(self) -> None:
+        """Revalidate every repository and rebuild the indexes."""
+        self.load(refresh=True)
+
+    def invalidate(self) -> None:
+        """Drop the loaded catalog so the next access reloads it."""
+        self._apps = None
+
+    def _ensure_loaded(self) -> None:
+        if self._apps is None:
+            self.load()
+
+    @property
+    def apps(self) -> Dict:
+        self._ensure_loaded()
+        return self._apps
+
+    def get(self, app_id: str) -> Optional[Dict]:
+        """Look up an app by its ID."""
+        return self.apps.get(app_id)
+
+    def sorted_items(self) -> List[Tuple[str, Dict]]:
+        """Return all apps ordered by category and name."""
+        self._ensure_loaded()
+        return self._sorted
+
+    def categories(self) -> List[str]:
+        """Return the category names in display order."""
+        self._ensure_loaded()
+        return list(self._by_category)
+
+    def in_category(self, category: str) -> List[Tuple[str, Dict]]:
+        """Return the apps of a category ordered by name."""
+        self._ensure_loaded()
+        return self._by_category.get(category, [])
+
+    def in_repository(self, name: str) -> List[Tuple[str, Dict]]:
+        """Return the apps provided by a repository."""
+        self._ensure_loaded()
+        return self._by_repository.get(name, [])
+
+    @property
+    def version(self) -> str:
+        """Digest identifying the searchable content of the catalog."""
+        if self._version is None:
+            hasher = hashlib.sha256()
+            for app_id, app in self.sorted_items():
+                fields = (app_id, app['name'], app.get('category', ''), app.get('description', ''))
+                hasher.update('\0'.join(fields).encode() + b'\1')
+            self._version = hasher.hexdigest()[:16]
+        return self._version
+
+    def search(self, query: str) -> List[Tuple[str, Dict]]:
+        """Return the apps matching a query, most relevant first."""
+        if self._search_index is None and self._search_blob is not None:
+            import marshal
+            self._search_index = SearchIndex.from_dict(marshal.loads(self._search_blob))
+        if self._search_index is None:
+            self._search_index = load_search_index(self.apps, self.version)
+        return [(app_id, self.apps[app_id]) for app_id in self._search_index.search(query)]
+
+    def __len__(self) -> int:
+        return len(self.apps)
+
+_catalog = Catalog()
+
+def get_catalog() -> Catalog:
+    """Return the catalog shared by the current session."""
+    return _catalog
+
 class Repository:
     def __init__(self, name: str, url: str, enabled: bool = True):
         self.name = name
@@ -92,163 +1536,1287 @@ def save_repositories(repositories: List[Repository]) -> bool:
 def add_repository(name: str, url: str) -> bool:
     """Add a new repository."""
     try:
-        # Validate URL by trying to fetch it
+        # Validate URL by trying to fetch it; this also fills the catalog
+        # cache, so the next load doesn't download the repository again
+        try:
+            repo_apps = run_sync(fetch_repository_async(Repository(name, url), refresh=True))
+            if not isinstance(repo_apps, dict):
+                raise ValueError("Invalid repository format")
+        except Exception as e:
+            color_print(f"Invalid repository URL or format: {str(e)}", Colors.RED)
+            return False
+
+        repositories = load_repositories()
+        
+        # Check if repository with same name already exists
+        if any(repo.name == name for repo in repositories):
+            color_print(f"Repository with name '{name}' already exists", Colors.RED)
+            return False
+            
+        repositories.append(Repository(name, url))
+        if not save_repositories(repositories):
+            return False
+        get_catalog().invalidate()
+        return True
+    except Exception as e:
+        color_print(f"Error adding repository: {str(e)}", Colors.RED)
+        return False
+
+def remove_repository(name: str) -> bool:
+    """Remove a repository by name."""
+    try:
+        repositories = load_repositories()
+        repositories = [repo for repo in repositories if repo.name != name]
+        if not save_repositories(repositories):
+            return False
+        get_catalog().invalidate()
+        return True
+    except Exception as e:
+        color_print(f"Error removing repository: {str(e)}", Colors.RED)
+        return False
+
+def list_repositories() -> None:
+    """List all repositories."""
+    repositories = load_repositories()
+    if not repositories:
+        color_print("No repositories configured", Colors.YELLOW)
+        return
+
+    checks = read_link_checks()['repositories']
+    color_print("\n📚 Configured Repositories:", Colors.CYAN + Colors.BOLD)
+    for repo in repositories:
+        status = "✅ Enabled" if repo.enabled else "❌ Disabled"
+        color_print(f"\n• {repo.name}", Colors.BLUE + Colors.BOLD)
+        color_print(f"  URL: {repo.url}")
+        color_print(f"  Status: {status}", Colors.GREEN if repo.enabled else Colors.RED)
+        check = checks.get(repo.name)
+        if check:
+            checked = time.strftime('%Y-%m-%d %H:%M', time.localtime(check['checked_at']))
+            color_print(f"  Links: {check['links'] - check['dead']}/{check['links']} alive (checked {checked})",
+                        Colors.GREEN if not check['dead'] else Colors.RED)
+
+def display_title() -> None:
+    """Display the title."""
+    os.system('clear')
+    color_print("\n=== ZortosHub ===", Colors.CYAN + Colors.BOLD)
+    color_print("Your Mac App Hub\n", Colors.YELLOW)
+
+# Installed apps
+APP_DIRS = os.environ.get(
+    'ZORTOSHUB_APP_DIRS', os.pathsep.join(['/Applications', os.path.expanduser('~/Applications')])
+).split(os.pathsep)
+INSTALLED_CACHE = os.path.join(CACHE_DIR, 'installed.json')
+
+def read_bundle_version(bundle_path: str) -> Optional[str]:
+    """Read the version of an .app bundle from its Info.plist."""
+    import plistlib
+    try:
+        with open(os.path.join(bundle_path, 'Contents', 'Info.plist'), 'rb') as f:
+            info = plistlib.load(f)
+        return info.get('CFBundleShortVersionString') or info.get('CFBundleVersion')
+    except Exception:
+        return None
+
+class InstalledApps:
+    """Installed .app bundles and their versions, from one scan per install directory.
+    
+    A directory is only rescanned when its mtime changes (an app was added,
+    removed or replaced); the result is kept in memory and in the cache
+    directory so later runs don't re-read every Info.plist.
+    """
+    def __init__(self, app_dirs: List[str], cache_path: Optional[str] = None):
+        self.app_dirs = app_dirs
+        self.cache_path = cache_path
+        self._dirs = None
+        self._lock = threading.Lock()
+
+    def _load_cache(self) -> Dict:
+        if self.cache_path:
+            try:
+                with open(self.cache_path, 'r') as f:
+                    return json.load(f)
+            except (OSError, ValueError):
+                pass
+        return {}
+
+    def scan(self) -> Dict[str, Optional[str]]:
+        """Return installed app names mapped to their bundle versions."""
+        with self._lock:
+            if self._dirs is None:
+                self._dirs = self._load_cache()
+            changed = False
+            installed = {}
+            for app_dir in self.app_dirs:
+                try:
+                    mtime = os.stat(app_dir).st_mtime_ns
+                except OSError:
+                    continue
+                entry = self._dirs.get(app_dir)
+                if entry is None or entry['mtime'] != mtime:
+                    apps = {}
+                    for bundle in os.scandir(app_dir):
+                        if bundle.name.endswith('.app'):
+                            apps[bundle.name[:-4]] = read_bundle_version(bundle.path)
+                    entry = self._dirs[app_dir] = {'mtime': mtime, 'apps': apps}
+                    changed = True
+                for name, version in entry['apps'].items():
+                    installed.setdefault(name, version)
+            if changed and self.cache_path:
+                try:
+                    atomic_write(self.cache_path, json.dumps(self._dirs).encode())
+                except OSError:
+                    pass
+            return installed
+
+_installed_apps = InstalledApps(APP_DIRS, INSTALLED_CACHE)
+
+def get_installed_apps() -> Dict[str, Optional[str]]:
+    """Return installed app names mapped to their versions."""
+    return _installed_apps.scan()
+
+def is_app_installed(app_name: str) -> bool:
+    """Check if an app is already installed."""
+    return app_name in get_installed_apps()
+
+def parse_version(version: str) -> Tuple[int, ...]:
+    """Turn a version string like '3.2.1' into a comparable tuple."""
+    return tuple(int(part) for part in re.findall(r'\d+', version))
+
+def update_available(app: Dict, installed_version: Optional[str]) -> bool:
+    """Check whether the catalog offers a newer version than the installed one."""
+    if not app.get('version') or not installed_version:
+        return False
+    return parse_version(str(app['version'])) > parse_version(installed_version)
+
+def format_size(num_bytes: float) -> str:
+    """Format a byte count for display."""
+    for unit in ('B', 'KB', 'MB', 'GB'):
+        if num_bytes < 1024 or unit == 'GB':
+            return f"{num_bytes:.0f} {unit}" if unit == 'B' else f"{num_bytes:.1f} {unit}"
+        num_bytes /= 1024
+
+# Transfer scheduling
+LIMIT_RATE = os.environ.get('ZORTOSHUB_LIMIT_RATE', '')  # global bandwidth cap, e.g. "5M"; empty for none
+DEFAULT_INSTALL_PRIORITY = 100  # apps may set a lower 'priority' to be downloaded first
+
+def parse_rate(rate: str) -> int:
+    """Parse a byte rate like '500K', '5M' or '1.5G' into bytes per second."""
+    match = re.fullmatch(r'\s*([\d.]+)\s*([KMG]?)I?B?(?:/S)?\s*', rate.upper())
+    if not match:
+        raise ValueError(f"invalid rate: {rate}")
+    multiplier = {'': 1, 'K': 1024, 'M': 1024 ** 2, 'G': 1024 ** 3}[match.group(2)]
+    return int(float(match.group(1)) * multiplier)
+
+class TokenBucket:
+    """Global bytes/sec cap shared by every concurrent transfer.
+    
+    Transfers consume tokens after each read; a transfer that overdraws the
+    bucket sleeps until the debt is paid back, so the combined rate of all
+    transfers converges on `rate` without per-download bookkeeping.
+    """
+    def __init__(self, rate: int = 0, burst: Optional[int] = None):
+        self.rate = rate
+        self.capacity = burst or max(rate // 4, 64 * 1024)
+        self._tokens = self.capacity
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def chunk_size(self, block_size: int) -> int:
+        """Shrink reads when limited so the rate is applied smoothly."""
+        if not self.rate:
+            return block_size
+        return max(16 * 1024, min(block_size, self.rate // 10))
+
+    def consume(self, amount: int) -> None:
+        if not self.rate:
+            return
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+            self._last = now
+            self._tokens -= amount
+            wait = -self._tokens / self.rate
+        if wait > 0:
+            time.sleep(wait)
+
+_bandwidth = TokenBucket(parse_rate(LIMIT_RATE) if LIMIT_RATE else 0)
+
+def get_bandwidth() -> TokenBucket:
+    """Return the bandwidth limiter shared by all downloads."""
+    return _bandwidth
+
+class TransferScheduler:
+    """Hands out a fixed number of transfer slots, lowest priority value first.
+    
+    Transfers with equal priority get a slot in request order. A transfer
+    cancelled while waiting simply leaves the queue.
+    """
+    def __init__(self, max_active: int):
+        self.max_active = max_active
+        self._active = 0
+        self._waiters = []
+        self._counter = itertools.count()
+
+    @contextlib.asynccontextmanager
+    async def slot(self, priority: int = DEFAULT_INSTALL_PRIORITY):
+        import asyncio
+        if self._active < self.max_active and not self._waiters:
+            self._active += 1
+        else:
+            waiter = asyncio.get_running_loop().create_future()
+            heapq.heappush(self._waiters, (priority, next(self._counter), waiter))
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                if waiter.done() and not waiter.cancelled():
+                    self._release()  # the slot was handed over just before the cancel
+                raise
+        try:
+            yield
+        finally:
+            self._release()
+
+    def _release(self) -> None:
+        # Hand the slot straight to the next waiter that is still waiting
+        while self._waiters:
+            _, _, waiter = heapq.heappop(self._waiters)
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self._active -= 1
+
+# Progress reporting
+PROGRESS_MODE = os.environ.get('ZORTOSHUB_PROGRESS', 'auto')  # auto, tty, plain, json or none
+PROGRESS_INTERVAL = 0.1  # seconds between redraws of the live display
+PLAIN_PROGRESS_INTERVAL = 5.0  # seconds between progress lines when not on a terminal
+RATE_WINDOW = 5.0  # seconds of samples used for throughput/ETA
+
+class ProgressTask:
+    """Progress of a single transfer.
+    
+    Updating a task only stores two numbers, so it is safe to call from the
+    transfer loop on every block; drawing happens on the reporter's thread.
+    """
+    def __init__(self, reporter: 'ProgressReporter', name: str, total: int = 0, visible: bool = True):
+        self.reporter = reporter
+        self.name = name
+        self.total = total
+        self.done = 0
+        self.visible = visible
+        self.started = time.monotonic()
+        self.finished = None
+        self.ok = None
+        self._samples = collections.deque([(self.started, 0)])
+
+    def update(self, done: int, total: Optional[int] = None) -> None:
+        self.done = done
+        if total:
+            self.total = total
+
+    def finish(self, ok: bool = True) -> None:
+        if self.finished is None:
+            self.finished = time.monotonic()
+            self.ok = ok
+            self.reporter._finish(self)
+
+    def rate(self, now: float) -> float:
+        """Bytes per second over the last RATE_WINDOW seconds."""
+        samples = self._samples
+        samples.append((now, self.done))
+        while len(samples) > 2 and now - samples[1][0] > RATE_WINDOW:
+            samples.popleft()
+        elapsed = now - samples[0][0]
+        return (self.done - samples[0][1]) / elapsed if elapsed > 0 else 0.0
+
+class ProgressReporter:
+    """Draws transfer progress without getting in the way of the transfers.
+    
+    Modes:
+        tty    one line per active download, redrawn in place with ANSI escapes
+        plain  a progress line every few seconds (for logs and pipes)
+        json   JSON lines on stderr for automation
+        none   no progress output
+    """
+    def __init__(self, mode: str = 'auto', interval: float = PROGRESS_INTERVAL):
+        if mode == 'auto':
+            mode = 'tty' if sys.stdout.isatty() else 'plain'
+        if mode not in ('tty', 'plain', 'json', 'none'):
+            raise ValueError(f"unknown progress mode: {mode}")
+        self.mode = mode
+        self.interval = PLAIN_PROGRESS_INTERVAL if mode == 'plain' else interval
+        self._tasks = []
+        self._drawn = 0
+        self._paused = 0
+        self._lock = threading.RLock()
+        self._wakeup = threading.Event()
+        self._thread = None
+
+    @property
+    def active(self) -> bool:
+        return self.mode == 'tty' and self._drawn > 0
+
+    def task(self, name: str, total: int = 0, visible: bool = True) -> ProgressTask:
+        """Start tracking a transfer."""
+        task = ProgressTask(self, name, total, visible and self.mode != 'none')
+        if task.visible:
+            with self._lock:
+                self._tasks.append(task)
+                self._emit_json('start', task)
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name='progress', daemon=True)
+                    self._thread.start()
+            self._wakeup.set()
+        return task
+
+    def write(self, text: str) -> None:
+        """Print text above the live progress lines."""
+        with self._lock:
+            sys.stdout.write(self._clear() + text)
+            if not text.endswith('\n'):
+                sys.stdout.write('\n')
+            self._draw()
+
+    @contextlib.contextmanager
+    def paused(self):
+        """Stop redrawing, e.g. while waiting for user input."""
+        with self._lock:
+            self._paused += 1
+            sys.stdout.write(self._clear())
+            sys.stdout.flush()
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._paused -= 1
+            self._wakeup.set()
+
+    def _finish(self, task: ProgressTask) -> None:
+        if not task.visible:
+            return
+        with self._lock:
+            if task in self._tasks:
+                self._tasks.remove(task)
+            self._emit_json('done', task)
+            if self.mode in ('tty', 'plain'):
+                sys.stdout.write(self._clear() + self._format(task, task.finished) + '\n')
+                self._draw()
+
+    def _run(self) -> None:
+        while True:
+            self._wakeup.wait(self.interval)
+            self._wakeup.clear()
+            with self._lock:
+                if self._paused or not self._tasks:
+                    continue
+                if self.mode == 'json':
+                    for task in self._tasks:
+                        self._emit_json('progress', task)
+                elif self.mode == 'plain':
+                    now = time.monotonic()
+                    sys.stdout.write(''.join(self._format(task, now) + '\n' for task in self._tasks))
+                    sys.stdout.flush()
+                elif self.mode == 'tty':
+                    sys.stdout.write(self._clear())
+                    self._draw()
+
+    def _clear(self) -> str:
+        # Move to the first progress line and erase to the end of the screen
+        if not self._drawn:
+            return ''
+        drawn, self._drawn = self._drawn, 0
+        return f"\033[{drawn}F\033[J"
+
+    def _draw(self) -> None:
+        if self.mode == 'tty' and not self._paused and self._tasks:
+            now = time.monotonic()
+            sys.stdout.write(''.join(self._format(task, now) + '\n' for task in self._tasks))
+            self._drawn = len(self._tasks)
+        sys.stdout.flush()
+
+    def _format(self, task: ProgressTask, now: float) -> str:
+        if task.finished is not None:
+            elapsed = max(task.finished - task.started, 1e-6)
+            if not task.ok:
+                return f"{Colors.RED}❌ {task.name}: failed after {format_size(task.done)}{Colors.RESET}"
+            return (f"{Colors.GREEN}✨ {task.name}: {format_size(task.done)} in {elapsed:.1f}s "
+                    f"({format_size(task.done / elapsed)}/s){Colors.RESET}")
+        rate = task.rate(now)
+        parts = [f"📥 {task.name:<20.20}"]
+        if task.total:
+            percent = min(100, task.done * 100 // task.total)
+            filled = percent // 5
+            parts.append(f"[{'#' * filled}{'.' * (20 - filled)}] {percent:3d}%")
+            parts.append(f"{format_size(task.done)} / {format_size(task.total)}")
+        else:
+            parts.append(format_size(task.done))
+        parts.append(f"{format_size(rate)}/s")
+        if task.total and rate > 0:
+            remaining = int((task.total - task.done) / rate)
+            parts.append(f"ETA {remaining // 60}:{remaining % 60:02d}")
+        return '  '.join(parts)
+
+    def _emit_json(self, event: str, task: ProgressTask) -> None:
+        if self.mode != 'json':
+            return
+        now = task.finished or time.monotonic()
+        record = {
+            'event': event,
+            'name': task.name,
+            'bytes': task.done,
+            'total': task.total or None,
+            'elapsed': round(now - task.started, 3),
+            'rate': round(task.rate(now)) if event == 'progress' else None,
+        }
+        if event == 'done':
+            record['ok'] = task.ok
+        sys.stderr.write(json.dumps(record) + '\n')
+        sys.stderr.flush()
+
+_progress = None
+
+def get_progress() -> ProgressReporter:
+    """Return the progress reporter shared by all downloads."""
+    global _progress
+    if _progress is None:
+        _progress = ProgressReporter(PROGRESS_MODE)
+    return _progress
+
+def download_journal_path(filepath: str) -> str:
+    """Return the path of the journal describing a partial download."""
+    return f"{filepath}.part.json"
+
+def read_download_journal(filepath: str) -> Dict:
+    """Read the journal of a partial download, if any."""
+    try:
+        with open(download_journal_path(filepath), 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def write_download_journal(filepath: str, journal: Dict) -> None:
+    """Record the progress of a partial download."""
+    atomic_write(download_journal_path(filepath), json.dumps(journal).encode())
+
+def clear_download_journal(filepath: str) -> None:
+    """Remove the journal of a finished or abandoned download."""
+    try:
+        os.remove(download_journal_path(filepath))
+    except FileNotFoundError:
+        pass
+
+def resume_validator(journal: Dict) -> Optional[str]:
+    """Return the If-Range validator for a partial download, if it can be resumed."""
+    etag = journal.get('etag')
+    if etag and not etag.startswith('W/'):
+        return etag
+    return journal.get('last_modified')
+
+def hash_file(path: str, limit: Optional[int] = None) -> 'hashlib._Hash':
+    """Return a SHA-256 hasher fed with (the first `limit` bytes of) a file."""
+    hasher = hashlib.sha256()
+    remaining = os.path.getsize(path) if limit is None else limit
+    with open(path, 'rb') as f:
+        while remaining > 0:
+            block = f.read(min(remaining, 1024 * 1024))
+            if not block:
+                break
+            hasher.update(block)
+            remaining -= len(block)
+    return hasher
+
+JOURNAL_INTERVAL = 1.0  # seconds between journal updates of a running download
+
+def stream_download(url: str, filepath: str, progress, block_size: int, shared: bool = False,
+                    source_validators: Optional[Dict] = None) -> str:
+    """Stream `url` into `filepath`, resuming a previous partial download if possible.
+    
+    Data is written to `<filepath>.part` and the bytes written so far are
+    recorded in a journal next to it. A later attempt sends Range/If-Range
+    and appends to the partial file; if the server ignores the range (or the
+    file changed upstream) the download restarts from zero. With `shared`,
+    a partial file downloaded from another mirror of the same file is
+    resumed too, as long as the server reports the same total size.
+    
+    Returns the SHA-256 of the file, computed while streaming. The
+    ETag/Last-Modified the file was downloaded with are stored in
+    `source_validators` when given.
+    """
+    import urllib.error
+    part_path = f"{filepath}.part"
+    journal = read_download_journal(filepath)
+    offset = 0
+    headers = {}
+    validator = resume_validator(journal)
+    resume_total = None  # size the server must confirm when resuming another source's file
+    if journal.get('url') == url and validator and 'segments' not in journal and os.path.exists(part_path):
+        offset = min(journal.get('bytes', 0), os.path.getsize(part_path))
+        if offset:
+            headers['Range'] = f"bytes={offset}-"
+            headers['If-Range'] = validator
+    elif (shared and journal.get('url') != url and journal.get('total') and 'segments' not in journal
+          and os.path.exists(part_path)):
+        # Validators differ between mirrors, so only the size can be checked
+        offset = min(journal.get('bytes', 0), os.path.getsize(part_path))
+        if offset:
+            headers['Range'] = f"bytes={offset}-"
+            resume_total = journal['total']
+    
+    try:
+        response = get_http_client().request(url, headers)
+    except urllib.error.HTTPError as e:
+        if e.code != 416 or not offset:
+            raise
+        # Our partial file is either already complete or no longer matches
+        content_range = e.headers.get('Content-Range', '')
+        if content_range.endswith(f"/{offset}"):
+            if source_validators is not None:
+                source_validators.update(etag=journal.get('etag'), last_modified=journal.get('last_modified'))
+            digest = hash_file(part_path, offset).hexdigest()
+            os.replace(part_path, filepath)
+            clear_download_journal(filepath)
+            return digest
+        clear_download_journal(filepath)
+        count_event('download.restarts')
+        return stream_download(url, filepath, progress, block_size, shared, source_validators)
+    
+    with response, span('download.transfer') as transfer:
+        content_length = int(response.headers.get('content-length', 0))
+        content_range = response.headers.get('Content-Range', '')
+        if (offset and response.status == 206 and content_range.startswith(f"bytes {offset}-")
+                and (resume_total is None or content_range.endswith(f"/{resume_total}"))):
+            color_print(f"Resuming download at {format_size(offset)}...", Colors.YELLOW)
+            total_size = offset + content_length if content_length else 0
+        else:
+            # Server ignored the range or the file changed: start over
+            if offset:
+                count_event('download.restarts')
+            offset = 0
+            total_size = content_length
+        transfer.set(resumed_from=offset)
+        
+        # Hash on the fly; only an already downloaded prefix is read back
+        hasher = hash_file(part_path, offset) if offset else hashlib.sha256()
+        journal = {
+            'url': url,
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified'),
+            'total': total_size,
+            'bytes': offset,
+        }
+        # Don't throw away a partial file for a transfer that was cancelled meanwhile
+        check_cancelled()
+        with open(part_path, 'r+b' if offset else 'wb') as out_file:
+            out_file.truncate(offset)
+            out_file.seek(offset)
+            write_download_journal(filepath, journal)
+            progress(offset, total_size)
+            last_journal = time.monotonic()
+            bandwidth = get_bandwidth()
+            read_size = bandwidth.chunk_size(block_size)
+            try:
+                while True:
+                    check_cancelled()
+                    block = response.read(read_size)
+                    if not block:
+                        break
+                    bandwidth.consume(len(block))
+                    out_file.write(block)
+                    out_file.flush()
+                    hasher.update(block)
+                    journal['bytes'] += len(block)
+                    transfer.add('bytes', len(block))
+                    if time.monotonic() - last_journal >= JOURNAL_INTERVAL:
+                        write_download_journal(filepath, journal)
+                        last_journal = time.monotonic()
+                    progress(journal['bytes'], total_size)
+            finally:
+                write_download_journal(filepath, journal)
+    
+    if total_size and journal['bytes'] < total_size:
+        raise IOError(f"connection closed after {format_size(journal['bytes'])} of {format_size(total_size)}")
+    os.replace(part_path, filepath)
+    clear_download_journal(filepath)
+    if source_validators is not None:
+        source_validators.update(etag=journal['etag'], last_modified=journal['last_modified'])
+    return hasher.hexdigest()
+
+# Segmented downloads
+DOWNLOAD_SEGMENTS = int(os.environ.get('ZORTOSHUB_DOWNLOAD_SEGMENTS', 1))  # 1 disables segmented mode
+MIN_SEGMENT_SIZE = 8 * 1024 * 1024
+SEGMENT_BLOCK_SIZE = 1024 * 1024
+
+def probe_download(url: str) -> Tuple[int, Dict, bool, str]:
+    """Probe a download URL for its size, validators, byte-range support and final URL."""
+    with get_http_client().request(url, {'Range': 'bytes=0-0'}) as response:
+        validators = {
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified'),
+        }
+        content_range = response.headers.get('Content-Range', '')
+        if response.status == 206 and '/' in content_range and not content_range.endswith('/*'):
+            return int(content_range.rsplit('/', 1)[1]), validators, True, response.url
+        return int(response.headers.get('content-length', 0)), validators, False, response.url
+
+def split_segments(total_size: int, segments: int) -> List[List[int]]:
+    """Split a file into `[start, end, written]` byte ranges."""
+    segments = max(1, min(segments, total_size // MIN_SEGMENT_SIZE))
+    segment_size = -(-total_size // segments)
+    return [[start, min(start + segment_size, total_size) - 1, 0]
+            for start in range(0, total_size, segment_size)]
+
+def segmented_download(url: str, filepath: str, progress, segments: int, shared: bool = False,
+                       source_validators: Optional[Dict] = None) -> Optional[str]:
+    """Download `url` over several concurrent byte-range connections.
+    
+    The partial file is preallocated and each segment is written in place
+    with positional writes; per-segment progress is kept in the download
+    journal so an interrupted download resumes only the missing ranges
+    (from another mirror of the same size too, with `shared`).
+    Returns the SHA-256 of the file, or None without downloading anything
+    when the server doesn't support ranges or the file is too small to be
+    worth splitting, so the caller can fall back to a single stream. The
+    file's ETag/Last-Modified are stored in `source_validators` when given.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+    with span('download.probe'):
+        total_size, validators, ranges, final_url = probe_download(url)
+    if not ranges or total_size < 2 * MIN_SEGMENT_SIZE:
+        return None
+    
+    part_path = f"{filepath}.part"
+    journal = read_download_journal(filepath)
+    same_source = (
+        journal.get('url') == url
+        and resume_validator(journal) is not None
+        and resume_validator(journal) == resume_validator(validators)
+    )
+    resumable = (
+        (same_source or shared and journal.get('url') != url)
+        and journal.get('total') == total_size
+        and journal.get('segments')
+        and os.path.exists(part_path)
+        and os.path.getsize(part_path) == total_size
+    )
+    if resumable:
+        color_print(f"Resuming download at {format_size(sum(seg[2] for seg in journal['segments']))}...", Colors.YELLOW)
+        journal.update(validators, url=url)
+    else:
+        journal = dict(validators, url=url, total=total_size, segments=split_segments(total_size, segments))
+        check_cancelled()
+        with open(part_path, 'wb') as out_file:
+            out_file.truncate(total_size)
+    journal['bytes'] = sum(seg[2] for seg in journal['segments'])
+    write_download_journal(filepath, journal)
+    progress(journal['bytes'], total_size)
+    
+    lock = threading.Lock()
+    last_journal = [time.monotonic()]
+    validator = resume_validator(validators)
+    # Segment threads don't inherit the cancel event of this thread
+    cancel = current_cancel_event()
+    
+    def fetch_segment(fd: int, segment: List[int]) -> None:
+        start, end, written = segment
+        if start + written > end:
+            return
+        headers = {'Range': f"bytes={start + written}-{end}"}
+        if validator:
+            headers['If-Range'] = validator
+        # Go straight to the redirect target instead of re-resolving it per segment
+        with span('download.segment', start=start + written, end=end) as segment_span, \
+                get_http_client().request(final_url, headers) as response:
+            if response.status != 206:
+                raise IOError("server stopped honouring byte ranges")
+            bandwidth = get_bandwidth()
+            read_size = bandwidth.chunk_size(SEGMENT_BLOCK_SIZE)
+            while True:
+                check_cancelled(cancel)
+                block = response.read(read_size)
+                if not block:
+                    break
+                bandwidth.consume(len(block))
+                os.pwrite(fd, block, start + segment[2])
+                segment_span.add('bytes', len(block))
+                with lock:
+                    segment[2] += len(block)
+                    journal['bytes'] += len(block)
+                    if time.monotonic() - last_journal[0] >= JOURNAL_INTERVAL:
+                        write_download_journal(filepath, journal)
+                        last_journal[0] = time.monotonic()
+                    progress(journal['bytes'], total_size)
+        if start + segment[2] <= end:
+            raise IOError(f"segment {start}-{end} ended early")
+    
+    fd = os.open(part_path, os.O_WRONLY)
+    try:
+        with ThreadPoolExecutor(max_workers=len(journal['segments'])) as executor:
+            futures = [executor.submit(fetch_segment, fd, segment) for segment in journal['segments']]
+            errors = [future.exception() for future in futures]
+    finally:
+        os.close(fd)
+        write_download_journal(filepath, journal)
+    
+    for error in errors:
+        if error is not None:
+            raise error
+    
+    # Verify every range arrived before finalizing
+    if journal['bytes'] != total_size or os.path.getsize(part_path) != total_size:
+        raise IOError(f"incomplete download: {format_size(journal['bytes'])} of {format_size(total_size)}")
+    os.replace(part_path, filepath)
+    clear_download_journal(filepath)
+    if source_validators is not None:
+        source_validators.update(validators)
+    # Segments arrive out of order, so they can't be hashed while streaming
+    with span('download.hash'):
+        return hash_file(filepath).hexdigest()
+
+# Content-addressed download cache
+DOWNLOAD_CACHE_DIR = os.path.join(CACHE_DIR, 'downloads')
+DOWNLOAD_CACHE_MAX = int(os.environ.get('ZORTOSHUB_DOWNLOAD_CACHE_MAX', 10 * 1024 ** 3))  # bytes, 0 disables
+_download_cache_lock = threading.Lock()
+
+def download_cache_blob(sha256: str) -> str:
+    """Return the cache path of the installer with the given SHA-256."""
+    return os.path.join(DOWNLOAD_CACHE_DIR, 'sha256', sha256.lower())
+
+def read_download_cache_index() -> Dict:
+    """Read the URL -> {sha256, size, etag, last_modified} index of the download cache."""
+    try:
+        with open(os.path.join(DOWNLOAD_CACHE_DIR, 'index.json'), 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def link_or_copy(src: str, dst: str) -> None:
+    """Hard-link `src` to `dst`, copying when the paths are on different volumes."""
+    import shutil
+    if os.path.exists(dst):
+        os.remove(dst)
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copyfile(src, dst)
+
+def revalidate_cached_download(url: str, entry: Dict) -> bool:
+    """Ask upstream whether the installer cached for `url` is still current.
+    
+    Sends a one-byte request made conditional on the ETag/Last-Modified
+    recorded with the cache entry.
+    """
+    import urllib.error
+    headers = {'Range': 'bytes=0-0'}
+    if entry.get('etag'):
+        headers['If-None-Match'] = entry['etag']
+    if entry.get('last_modified'):
+        headers['If-Modified-Since'] = entry['last_modified']
+    try:
+        with get_http_client().request(url, headers) as response:
+            response.read()
+    except urllib.error.HTTPError as e:
+        return e.code == 304
+    except Exception:
+        pass  # the download itself will report the problem
+    return False
+
+def restore_from_download_cache(url: str, filepath: str, sha256: Optional[str] = None,
+                                size: Optional[int] = None) -> bool:
+    """Serve an installer from the download cache.
+    
+    Entries are looked up by the catalog's `sha256` without touching the
+    network. Apps without one fall back to the installer last downloaded
+    from their URL, once a conditional request confirms it didn't change
+    upstream; in offline mode it is used as is. URLs without a cache entry
+    (or without validators to check it by) don't cost a request.
+    """
+    if not DOWNLOAD_CACHE_MAX:
+        return False
+    if not sha256:
+        entry = read_download_cache_index().get(url, {})
+        if not entry.get('sha256') or not (entry.get('etag') or entry.get('last_modified')):
+            return False
+        if not os.path.exists(download_cache_blob(entry['sha256'])):
+            return False
+        if not OFFLINE and not revalidate_cached_download(url, entry):
+            return False
+        sha256, size = entry['sha256'], size or entry.get('size')
+    if not sha256:
+        return False
+    blob = download_cache_blob(sha256)
+    try:
+        if size is not None and os.path.getsize(blob) != size:
+            return False
+        os.makedirs(os.path.dirname(filepath), exist_ok=True)
+        link_or_copy(blob, filepath)
+        os.utime(blob)  # mark as recently used
+    except OSError:
+        return False
+    return True
+
+def store_in_download_cache(url: str, filepath: str, sha256: str, validators: Optional[Dict] = None) -> None:
+    """Add a verified download to the cache and evict least recently used installers.
+    
+    `validators` (ETag/Last-Modified of `url`) let apps without a `sha256`
+    reuse the installer once upstream confirms it is unchanged.
+    """
+    if not DOWNLOAD_CACHE_MAX:
+        return
+    try:
+        with _download_cache_lock:
+            blob = download_cache_blob(sha256)
+            os.makedirs(os.path.dirname(blob), exist_ok=True)
+            if not os.path.exists(blob):
+                link_or_copy(filepath, blob)
+            os.utime(blob)
+            index = read_download_cache_index()
+            index[url] = {'sha256': sha256, 'size': os.path.getsize(blob)}
+            index[url].update((key, value) for key, value in (validators or {}).items() if value)
+            atomic_write(os.path.join(DOWNLOAD_CACHE_DIR, 'index.json'), json.dumps(index, indent=4).encode())
+            evict_download_cache(keep=sha256)
+    except OSError as e:
+        color_print(f"Warning: could not update download cache: {str(e)}", Colors.YELLOW)
+
+def evict_download_cache(keep: Optional[str] = None) -> None:
+    """Remove least recently used installers until the cache fits DOWNLOAD_CACHE_MAX."""
+    blob_dir = os.path.join(DOWNLOAD_CACHE_DIR, 'sha256')
+    blobs = []
+    for entry in os.scandir(blob_dir):
+        stat = entry.stat()
+        blobs.append((stat.st_mtime, stat.st_size, entry.name, entry.path))
+    total = sum(blob[1] for blob in blobs)
+    for _, blob_size, name, path in sorted(blobs):
+        if total <= DOWNLOAD_CACHE_MAX:
+            break
+        if name == keep:
+            continue
+        os.remove(path)
+        total -= blob_size
+
+def verify_download(filepath: str, digest: str, sha256: Optional[str] = None, size: Optional[int] = None) -> bool:
+    """Check a download against the size and SHA-256 published in the catalog."""
+    actual_size = os.path.getsize(filepath)
+    if size is not None and actual_size != size:
+        error = f"expected {size} bytes, got {actual_size}"
+    elif sha256 and digest.lower() != sha256.lower():
+        error = f"expected sha256 {sha256}, got {digest}"
+    else:
+        return True
+    os.remove(filepath)
+    color_print(f"\n❌ Integrity check failed: {error}", Colors.RED)
+    return False
+
+# Fetch policy
+#
+# Downloads go through fetch_download. An app's url and its optional
+# 'mirrors' are ranked by measured latency, transient failures (timeouts,
+# resets, 5xx, 429) are retried with exponential backoff and jitter, and a
+# source failing mid-transfer hands the partial file over to the next one,
+# which resumes it instead of starting over.
+DOWNLOAD_RETRIES = int(os.environ.get('ZORTOSHUB_DOWNLOAD_RETRIES', 4))  # retries per download, across all sources
+RETRY_BACKOFF = 0.5  # seconds before the first retry; doubled for every further one
+RETRY_BACKOFF_MAX = 30.0
+RETRYABLE_STATUS = (408, 425, 429, 500, 502, 503, 504)
+MIRROR_SELECTION = os.environ.get('ZORTOSHUB_MIRROR_SELECTION', 'latency')  # latency, or order to keep the listed order
+PROBE_TIMEOUT = 5  # seconds allowed per source latency probe
+_source_throughput = {}  # host -> bytes/s of the last download from it
+
+def is_retryable(error: Exception) -> bool:
+    """Tell whether a failed download is worth retrying."""
+    import http.client
+    import urllib.error
+    if isinstance(error, urllib.error.HTTPError):
+        return error.code in RETRYABLE_STATUS
+    if isinstance(error, urllib.error.URLError):
+        # Connection failures wrap the socket error; redirect loops, bad URLs and offline mode don't
+        return isinstance(error.reason, OSError)
+    return isinstance(error, (OSError, http.client.HTTPException))
+
+def retry_delay(retry: int, error: Exception) -> float:
+    """Seconds to wait before retry number `retry` (counting from 1).
+    
+    Honours a numeric Retry-After header; otherwise half of the exponential
+    backoff is fixed and half is random, so clients don't retry in lockstep.
+    """
+    import random
+    headers = getattr(error, 'headers', None)
+    retry_after = (headers.get('Retry-After') or '') if headers is not None else ''
+    if retry_after.strip().isdigit():
+        return min(float(retry_after), RETRY_BACKOFF_MAX)
+    backoff = min(RETRY_BACKOFF * 2 ** (retry - 1), RETRY_BACKOFF_MAX)
+    return backoff / 2 + random.uniform(0, backoff / 2)
+
+def wait_before_retry(delay: float) -> None:
+    """Sleep for a retry backoff, waking up early if the transfer is cancelled."""
+    event = current_cancel_event()
+    if event is None:
+        time.sleep(delay)
+        return
+    event.wait(delay)
+    check_cancelled(event)
+
+def source_host(url: str) -> str:
+    """Return the host (and port) of a download source, for messages and statistics."""
+    import urllib.parse
+    return urllib.parse.urlsplit(url).netloc or url
+
+def probe_link(url: str, timeout: float = PROBE_TIMEOUT) -> Dict:
+    """Probe a download URL with a one-byte range request.
+    
+    Returns when it was checked, the HTTP status, the time to first byte
+    ('latency'), the file size and byte-range support when the server
+    reports them, and an 'error' message if the link is dead.
+    """
+    import urllib.error
+    result = {'checked_at': time.time()}
+    start = time.perf_counter()
+    try:
+        with get_http_client().request(url, {'Range': 'bytes=0-0'}, timeout=timeout) as response:
+            result['latency'] = round(time.perf_counter() - start, 4)
+            result['status'] = response.status
+            result['ranges'] = response.status == 206
+            content_range = response.headers.get('Content-Range', '')
+            if response.status == 206 and '/' in content_range and not content_range.endswith('/*'):
+                result['size'] = int(content_range.rsplit('/', 1)[1])
+                # Reading the single byte keeps the connection reusable
+                response.read()
+            elif response.headers.get('Content-Length'):
+                result['size'] = int(response.headers['Content-Length'])
+            if response.url != url:
+                result['final_url'] = response.url
+    except urllib.error.HTTPError as e:
+        result['status'] = e.code
+        if e.code == 416 and (e.headers.get('Content-Range') or '').endswith('/0'):
+            # An empty file can't satisfy a one-byte range
+            result.update(latency=round(time.perf_counter() - start, 4), ranges=True, size=0)
+        else:
+            result['error'] = f"HTTP {e.code} {e.reason}"
+    except Exception as e:
+        reason = e.reason if isinstance(e, urllib.error.URLError) else e
+        result['error'] = str(reason) or type(reason).__name__
+    return result
+
+def probe_latency(url: str) -> Optional[float]:
+    """Return the time to first byte of a one-byte request, or None if the source fails."""
+    result = probe_link(url)
+    return None if 'error' in result else result['latency']
+
+def rank_sources(urls: List[str], size: Optional[int] = None) -> List[str]:
+    """Order download sources, the one expected to finish first at the front.
+    
+    Sources are probed concurrently and scored by latency plus, for hosts an
+    earlier download measured, the expected transfer time of `size` bytes.
+    Sources failing the probe keep their listed order at the back.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+    if len(urls) < 2 or MIRROR_SELECTION != 'latency':
+        return list(urls)
+    with span('download.rank_sources', sources=len(urls)):
+        with ThreadPoolExecutor(max_workers=len(urls)) as executor:
+            latencies = list(executor.map(probe_latency, urls))
+    
+    def score(index: int) -> Tuple:
+        latency = latencies[index]
+        if latency is None:
+            return (1, index)
+        throughput = _source_throughput.get(source_host(urls[index]))
+        if throughput and size:
+            latency += size / throughput
+        return (0, latency)
+    
+    return [urls[index] for index in sorted(range(len(urls)), key=score)]
+
+def fetch_download(sources: List[str], filepath: str, progress, segments: int, block_size: int,
+                   size: Optional[int] = None, source_validators: Optional[Dict] = None) -> Tuple[str, str]:
+    """Download a file from the first source that works; return its SHA-256 and the source used.
+    
+    On a retryable error the next source takes over, resuming the partial
+    file when it reports the same size; once every source has been tried,
+    the next round waits for a backoff first. Sources that fail permanently
+    (404, 403, ...) are dropped. At most DOWNLOAD_RETRIES retries are made.
+    The validators of the source used are stored in `source_validators`.
+    """
+    sources = list(dict.fromkeys(sources))
+    mirrors = set(sources) if len(sources) > 1 else set()
+    sources = rank_sources(sources, size)
+    index = 0
+    retries = 0
+    while True:
+        url = sources[index]
+        start = time.perf_counter()
+        # A partial file from any of the sources can be resumed from any other
+        shared = read_download_journal(filepath).get('url') in mirrors
+        try:
+            digest = None
+            if segments > 1:
+                digest = segmented_download(url, filepath, progress, segments, shared, source_validators)
+            if not digest:
+                digest = stream_download(url, filepath, progress, block_size, shared, source_validators)
+        except (TransferCancelled, KeyboardInterrupt):
+            # Not a failure of the source: stop here and keep the partial file
+            raise
+        except Exception as e:
+            if not is_retryable(e):
+                if len(sources) == 1:
+                    raise
+                color_print(f"Source {source_host(url)} failed ({str(e)}), trying the next one", Colors.YELLOW)
+                count_event('download.failovers')
+                del sources[index]
+                index %= len(sources)
+                continue
+            retries += 1
+            if retries > DOWNLOAD_RETRIES:
+                raise
+            next_index = (index + 1) % len(sources)
+            if next_index <= index:
+                # Every source failed this round: back off before trying again
+                delay = retry_delay(retries, e)
+                color_print(f"Download failed ({str(e)}), retrying in {delay:.1f}s "
+                            f"({retries}/{DOWNLOAD_RETRIES})", Colors.YELLOW)
+                count_event('download.retries')
+                wait_before_retry(delay)
+            else:
+                color_print(f"Download from {source_host(url)} failed ({str(e)}), "
+                            f"switching to {source_host(sources[next_index])}", Colors.YELLOW)
+                count_event('download.failovers')
+            index = next_index
+            continue
+        elapsed = time.perf_counter() - start
+        if elapsed > 0:
+            _source_throughput[source_host(url)] = os.path.getsize(filepath) / elapsed
+        return digest, url
+
+def transfer_file(url: str, filepath: str, app_name: str, segments: Optional[int] = None,
+                  show_status: bool = True, sha256: Optional[str] = None, size: Optional[int] = None,
+                  mirrors: Optional[List[str]] = None) -> bool:
+    """Download a file with progress tracking, blocking (see download_file_async).
+    
+    The file comes from `url` or one of its `mirrors`, with retries and
+    failover as described in fetch_download.
+    
+    With more than one segment (`segments` or ZORTOSHUB_DOWNLOAD_SEGMENTS) the
+    file is fetched over parallel byte-range connections when the server
+    supports it, falling back to a single stream otherwise. Progress goes to
+    the shared ProgressReporter unless `show_status` is False.
+    
+    Files already in the download cache are served from disk. New downloads
+    are checked against `sha256`/`size` when given and then cached.
+    """
+    import urllib.error
+    with span('download', app=app_name) as download_span:
+        task = None
         try:
-            with urllib.request.urlopen(url) as response:
-                if response.getcode() != 200:
-                    raise ValueError("Invalid repository URL")
-                # Try to parse as JSON to validate format
-                json.loads(response.read().decode())
+            with span('download.cache_restore'):
+                cached = restore_from_download_cache(url, filepath, sha256, size)
+            download_span.set(cached=cached)
+            if cached:
+                color_print(f"\n📦 Using cached installer for {app_name}", Colors.GREEN)
+                return True
+            
+            color_print(f"\n📥 Downloading {app_name}...")
+            
+            # The transfer loops only update counters; drawing is throttled elsewhere
+            task = get_progress().task(app_name, visible=show_status)
+            show_progress = task.update
+            
+            # Create parent directory if it doesn't exist
+            os.makedirs(os.path.dirname(filepath), exist_ok=True)
+            
+            # 1MB reads keep progress and journal updates fine-grained
+            BLOCK_SIZE = 1024 * 1024
+            
+            # Download with progress tracking, resuming any partial download
+            try:
+                validators = {}
+                digest, source = fetch_download([url] + list(mirrors or []), filepath, show_progress,
+                                                segments or DOWNLOAD_SEGMENTS, BLOCK_SIZE, size, validators)
+                download_span.set(source=source_host(source))
+            except urllib.error.URLError as e:
+                color_print(f"\n❌ Download failed: {str(e)}", Colors.RED)
+                return False
+            
+            with span('download.verify'):
+                verified = verify_download(filepath, digest, sha256, size)
+            if not verified:
+                return False
+            with span('download.cache_store'):
+                # A mirror's validators say nothing about the file at `url`
+                store_in_download_cache(url, filepath, digest, validators if source == url else None)
+            task.finish()
+            color_print(f"✨ Download complete!", Colors.GREEN)
+            return True
+        
+        except TransferCancelled:
+            color_print(f"\n⏸  Download of {app_name} interrupted, it will resume from where it stopped", Colors.YELLOW)
+            return False
         except Exception as e:
-            color_print(f"Invalid repository URL or format: {str(e)}", Colors.RED)
+            color_print(f"\nError downloading file: {str(e)}", Colors.RED)
             return False
+        finally:
+            if task is not None:
+                task.finish(ok=False)  # no-op once the download succeeded
 
-        repositories = load_repositories()
-        
-        # Check if repository with same name already exists
-        if any(repo.name == name for repo in repositories):
-            color_print(f"Repository with name '{name}' already exists", Colors.RED)
+async def download_file_async(url: str, filepath: str, app_name: str, segments: Optional[int] = None,
+                              show_status: bool = True, sha256: Optional[str] = None,
+                              size: Optional[int] = None, mirrors: Optional[List[str]] = None) -> bool:
+    """Download a file without blocking the event loop.
+    
+    Cancelling the task stops the transfer at its next block and keeps the
+    partial file and journal, so the next attempt resumes.
+    """
+    return await run_blocking(transfer_file, url, filepath, app_name, segments, show_status, sha256, size, mirrors)
+
+def download_file(url: str, filepath: str, app_name: str, segments: Optional[int] = None,
+                  show_status: bool = True, sha256: Optional[str] = None, size: Optional[int] = None,
+                  mirrors: Optional[List[str]] = None) -> bool:
+    """Synchronous wrapper around download_file_async."""
+    return run_sync(download_file_async(url, filepath, app_name, segments, show_status, sha256, size, mirrors))
+
+# Mounting
+MOUNT_BACKEND = os.environ.get('ZORTOSHUB_MOUNT_BACKEND', 'hdiutil')  # hdiutil, or fake to run installs off macOS
+MOUNT_TIMEOUT = 30  # seconds to wait for a volume to appear or go away
+MOUNT_POLL_INTERVAL = 0.02  # first readiness check; doubled up to MOUNT_POLL_MAX
+MOUNT_POLL_MAX = 0.5
+FAKE_VOLUMES_DIR = os.path.join(CACHE_DIR, 'volumes')
+FAKE_MOUNT_DELAY = float(os.environ.get('ZORTOSHUB_FAKE_MOUNT_DELAY', 0))  # seconds before a fake volume appears
+FAKE_IMAGE_MARKER = '.zortoshub-image'
+
+class MountError(Exception):
+    """Raised by mount backends with a message for the user."""
+
+def poll_until(condition, timeout: float = MOUNT_TIMEOUT) -> bool:
+    """Check `condition` with exponential backoff until it holds; False if `timeout` passes first."""
+    deadline = time.monotonic() + timeout
+    delay = MOUNT_POLL_INTERVAL
+    while not condition():
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
             return False
-            
-        repositories.append(Repository(name, url))
-        return save_repositories(repositories)
-    except Exception as e:
-        color_print(f"Error adding repository: {str(e)}", Colors.RED)
-        return False
+        time.sleep(min(delay, remaining))
+        delay = min(delay * 2, MOUNT_POLL_MAX)
+    return True
 
-def remove_repository(name: str) -> bool:
-    """Remove a repository by name."""
-    try:
-        repositories = load_repositories()
-        repositories = [repo for repo in repositories if repo.name != name]
-        return save_repositories(repositories)
-    except Exception as e:
-        color_print(f"Error removing repository: {str(e)}", Colors.RED)
-        return False
+class HdiutilBackend:
+    """Mounts disk images with hdiutil, reading its -plist output instead of scraping text."""
+    def _run(self, *args: str) -> bytes:
+        import subprocess
+        result = subprocess.run(['hdiutil', *args], stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        if result.returncode != 0:
+            raise MountError(self._describe(result.stderr.decode('utf-8', 'replace').strip()))
+        return result.stdout
 
-def list_repositories() -> None:
-    """List all repositories."""
-    repositories = load_repositories()
-    if not repositories:
-        color_print("No repositories configured", Colors.YELLOW)
-        return
+    @staticmethod
+    def _describe(message: str) -> str:
+        lowered = message.lower()
+        if "resource busy" in lowered:
+            return "DMG is in use. Please try closing any applications using it and try again."
+        if "no mountable file systems" in lowered:
+            return "Invalid DMG file: No mountable file systems"
+        if "image not recognized" in lowered:
+            return "Invalid DMG file: Image not recognized"
+        return f"hdiutil failed: {message}"
 
-    color_print("\n📚 Configured Repositories:", Colors.CYAN + Colors.BOLD)
-    for repo in repositories:
-        status = "✅ Enabled" if repo.enabled else "❌ Disabled"
-        color_print(f"\n• {repo.name}", Colors.BLUE + Colors.BOLD)
-        color_print(f"  URL: {repo.url}")
-        color_print(f"  Status: {status}", Colors.GREEN if repo.enabled else Colors.RED)
+    @staticmethod
+    def _mount_points(entities: List[Dict]) -> List[str]:
+        return [entity['mount-point'] for entity in entities if entity.get('mount-point')]
 
-def display_title() -> None:
-    """Display the title."""
-    os.system('clear')
-    color_print("\n=== ZortosHub ===", Colors.CYAN + Colors.BOLD)
-    color_print("Your Mac App Hub\n", Colors.YELLOW)
+    def images(self) -> Dict[str, List[str]]:
+        """Return the mount points of every attached image, by image path."""
+        import plistlib
+        info = plistlib.loads(self._run('info', '-plist'))
+        return {image.get('image-path', ''): self._mount_points(image.get('system-entities', []))
+                for image in info.get('images', [])}
 
-def is_app_installed(app_name: str) -> bool:
-    """Check if an app is already installed."""
-    applications_dir = "/Applications"
-    app_path = os.path.join(applications_dir, f"{app_name}.app")
-    return os.path.exists(app_path)
+    def attach(self, path: str) -> List[str]:
+        """Attach an image and return the mount points of its volumes."""
+        import plistlib
+        try:
+            result = plistlib.loads(self._run('attach', '-plist', path))
+        except plistlib.InvalidFileException:
+            # Images with a license agreement print it before the plist
+            raise MountError("hdiutil returned unexpected output") from None
+        return self._mount_points(result.get('system-entities', []))
 
-def download_file(url: str, filepath: str, app_name: str) -> bool:
-    """Download a file using urllib with progress tracking and optimized speed."""
-    try:
-        color_print(f"\n📥 Downloading {app_name}...")
-        
-        def show_progress(count, block_size, total_size):
-            if total_size > 0:
-                percent = int(count * block_size * 100 / total_size)
-                # Update progress every 5%
-                if percent % 5 == 0:
-                    os.system('clear')
-                    color_print(f"Installing {app_name}...\n", Colors.CYAN + Colors.BOLD)
-                    color_print(f"📥 Downloading: {percent}% complete", Colors.YELLOW)
-        
-        # Create parent directory if it doesn't exist
-        os.makedirs(os.path.dirname(filepath), exist_ok=True)
-        
-        # Create opener with optimized settings
-        opener = urllib.request.build_opener()
-        opener.addheaders = [
-            ('User-Agent', 'Mozilla/5.0'),
-            ('Accept', '*/*'),
-            ('Connection', 'keep-alive'),
-            ('Accept-Encoding', 'gzip, deflate')
-        ]
-        
-        # Set socket timeout and buffer size
-        import socket
-        socket.setdefaulttimeout(15)  # 15 seconds timeout
-        
-        # Use a larger buffer size (8MB)
-        BLOCK_SIZE = 8 * 1024 * 1024
-        
-        urllib.request.install_opener(opener)
+    def detach(self, mount_point: str) -> bool:
+        try:
+            self._run('detach', mount_point, '-force')
+        except MountError:
+            return False
+        return True
+
+    def is_mounted(self, mount_point: str) -> bool:
+        return os.path.ismount(mount_point)
+
+    def reveal(self, mount_point: str) -> None:
+        """Show a mounted volume in Finder."""
+        os.system(f'open "{mount_point}"')
+
+class FakeMountBackend:
+    """Pretends to mount images as directories under FAKE_VOLUMES_DIR.
+    
+    Lets the install pipeline run, be tested and be benchmarked without
+    macOS. Volumes appear FAKE_MOUNT_DELAY seconds after attaching, which
+    exercises the same readiness polling as a real mount.
+    """
+    def images(self) -> Dict[str, List[str]]:
+        images = {}
+        try:
+            entries = list(os.scandir(FAKE_VOLUMES_DIR))
+        except OSError:
+            return images
+        for entry in entries:
+            try:
+                with open(os.path.join(entry.path, FAKE_IMAGE_MARKER), 'r') as f:
+                    images.setdefault(f.read(), []).append(entry.path)
+            except OSError:
+                continue
+        return images
+
+    def attach(self, path: str) -> List[str]:
+        if not os.path.getsize(path):
+            raise MountError("Invalid DMG file: Image not recognized")
+        mount_point = os.path.join(FAKE_VOLUMES_DIR, os.path.splitext(os.path.basename(path))[0])
+        if os.path.exists(mount_point):
+            raise MountError("DMG is in use. Please try closing any applications using it and try again.")
         
-        # Get base URL for handling relative redirects
-        base_url = '/'.join(url.split('/')[:-1]) + '/'
+        def appear():
+            os.makedirs(mount_point, exist_ok=True)
+            with open(os.path.join(mount_point, FAKE_IMAGE_MARKER), 'w') as f:
+                f.write(os.path.realpath(path))
         
-        # Download with progress tracking
+        if FAKE_MOUNT_DELAY:
+            threading.Timer(FAKE_MOUNT_DELAY, appear).start()
+        else:
+            appear()
+        return [mount_point]
+
+    def detach(self, mount_point: str) -> bool:
+        import shutil
         try:
-            # Custom retrieval with larger buffer
-            with urllib.request.urlopen(url) as response, open(filepath, 'wb') as out_file:
-                total_size = int(response.headers.get('content-length', 0))
-                block_count = 0
-                while True:
-                    block = response.read(BLOCK_SIZE)
-                    if not block:
-                        break
-                    out_file.write(block)
-                    block_count += 1
-                    show_progress(block_count, BLOCK_SIZE, total_size)
-            
-            color_print(f"✨ Download complete!", Colors.GREEN)
-            return True
-            
-        except urllib.error.HTTPError as e:
-            if e.code == 308:  # Permanent Redirect
-                try:
-                    # Get the new location
-                    new_url = e.headers.get('Location')
-                    if new_url:
-                        # Handle relative URLs
-                        if new_url.startswith('/'):
-                            # Get the domain from original URL
-                            domain = '/'.join(url.split('/')[:3])
-                            new_url = domain + new_url
-                        color_print(f"Following redirect to: {new_url}", Colors.YELLOW)
-                        
-                        # Download from redirect with same optimized settings
-                        with urllib.request.urlopen(new_url) as response, open(filepath, 'wb') as out_file:
-                            total_size = int(response.headers.get('content-length', 0))
-                            block_count = 0
-                            while True:
-                                block = response.read(BLOCK_SIZE)
-                                if not block:
-                                    break
-                                out_file.write(block)
-                                block_count += 1
-                                show_progress(block_count, BLOCK_SIZE, total_size)
-                        
-                        color_print(f"✨ Download complete!", Colors.GREEN)
-                        return True
-                except Exception as redirect_error:
-                    color_print(f"\n❌ Download failed after redirect: {str(redirect_error)}", Colors.RED)
-                    return False
-            color_print(f"\n❌ Download failed: {str(e)}", Colors.RED)
+            shutil.rmtree(mount_point)
+        except OSError:
             return False
-        except urllib.error.URLError as e:
-            color_print(f"\n❌ Download failed: {str(e)}", Colors.RED)
-            return False
-            
-    except Exception as e:
-        color_print(f"\nError downloading file: {str(e)}", Colors.RED)
-        return False
+        return True
+
+    def is_mounted(self, mount_point: str) -> bool:
+        return os.path.exists(os.path.join(mount_point, FAKE_IMAGE_MARKER))
+
+    def reveal(self, mount_point: str) -> None:
+        pass
+
+MOUNT_BACKENDS = {'hdiutil': HdiutilBackend, 'fake': FakeMountBackend}
+_mount_backend = None
+
+def get_mount_backend() -> Union[HdiutilBackend, FakeMountBackend]:
+    """Return the mount backend selected by ZORTOSHUB_MOUNT_BACKEND."""
+    global _mount_backend
+    if _mount_backend is None:
+        if MOUNT_BACKEND not in MOUNT_BACKENDS:
+            raise ValueError(f"unknown mount backend '{MOUNT_BACKEND}' (expected {', '.join(MOUNT_BACKENDS)})")
+        _mount_backend = MOUNT_BACKENDS[MOUNT_BACKEND]()
+    return _mount_backend
 
 def mount_dmg(filepath: str, app_name: str) -> Optional[str]:
-    """Mount a DMG file and return the volume path."""
+    """Mount a DMG file and return the mount point of its volume."""
     try:
         color_print(f"\n💿 Mounting {app_name}...")
         
@@ -257,107 +2825,102 @@ def mount_dmg(filepath: str, app_name: str) -> Optional[str]:
             color_print(f"\n❌ DMG file not found: {filepath}", Colors.RED)
             return None
         
-        # Check if DMG is already mounted and force detach it
-        mounted_volumes = os.popen('hdiutil info').read()
-        if filepath in mounted_volumes:
+        backend = get_mount_backend()
+        
+        # Detach volumes left over from an earlier mount of the same image
+        with span('mount.info'):
+            images = backend.images()
+        image_path = os.path.realpath(filepath)
+        stale = [mount_point for path, mount_points in images.items()
+                 if os.path.realpath(path) == image_path for mount_point in mount_points]
+        if stale:
             color_print("Previous mount detected, cleaning up...", Colors.YELLOW)
-            # Parse the output to find mounted volumes from our DMG
-            current_image = None
-            current_volume = None
-            for line in mounted_volumes.split('\n'):
-                if filepath in line:
-                    current_image = True
-                elif current_image and '/Volumes/' in line:
-                    # This volume belongs to our DMG
-                    volume_path = line.split('/Volumes/')[-1].strip()
-                    full_path = f"/Volumes/{volume_path}"
-                    color_print(f"Detaching: {full_path}", Colors.YELLOW)
-                    detach_result = os.system(f'hdiutil detach "{full_path}" -force 2>/dev/null')
-                    if detach_result != 0:
-                        color_print("Warning: Failed to detach previous mount", Colors.YELLOW)
-                    time.sleep(2)
-                    break
-                elif line.strip() == '':
-                    current_image = False
-        
-        # Mount the DMG file
-        mount_cmd = f'hdiutil attach "{filepath}" 2>&1'
-        mount_output = os.popen(mount_cmd).read()
-        
-        # Wait a moment for the volume to appear
-        time.sleep(2)
-        
-        # Parse the mount output to find the volume path
-        volume_path = None
-        for line in mount_output.split('\n'):
-            if '/Volumes/' in line:
-                # Extract the volume path after /Volumes/
-                parts = line.split('/Volumes/')
-                if len(parts) > 1:
-                    volume_path = parts[-1].strip()
-                    # If we found a path, verify it exists
-                    full_path = f"/Volumes/{volume_path}"
-                    if os.path.exists(full_path):
-                        color_print(f"✨ Successfully mounted at: {full_path}", Colors.GREEN)
-                        return volume_path
-        
-        # If we get here, check for specific errors in the output
-        if "resource busy" in mount_output.lower():
-            color_print(f"\n❌ DMG is in use. Please try closing any applications using it and try again.", Colors.RED)
-        elif "no mountable file systems" in mount_output.lower():
+        for mount_point in stale:
+            color_print(f"Detaching: {mount_point}", Colors.YELLOW)
+            with span('mount.detach'):
+                detached = backend.detach(mount_point)
+                detached = detached and poll_until(lambda: not backend.is_mounted(mount_point))
+            if not detached:
+                color_print("Warning: Failed to detach previous mount", Colors.YELLOW)
+        
+        with span('mount.attach'):
+            mount_points = backend.attach(filepath)
+        if not mount_points:
             color_print(f"\n❌ Invalid DMG file: No mountable file systems", Colors.RED)
-        elif "image not recognized" in mount_output.lower():
-            color_print(f"\n❌ Invalid DMG file: Image not recognized", Colors.RED)
-        else:
-            color_print(f"\nMount output for debugging:", Colors.YELLOW)
-            print(mount_output)
+            return None
         
+        # The volume can show up a moment after attach returns
+        with span('mount.wait'):
+            mounted = poll_until(lambda: any(backend.is_mounted(mount_point) for mount_point in mount_points))
+        if not mounted:
+            color_print(f"\n❌ Volume did not appear within {MOUNT_TIMEOUT}s", Colors.RED)
+            return None
+        mount_point = next(mount_point for mount_point in mount_points if backend.is_mounted(mount_point))
+        color_print(f"✨ Successfully mounted at: {mount_point}", Colors.GREEN)
+        return mount_point
+    
+    except MountError as e:
+        color_print(f"\n❌ {str(e)}", Colors.RED)
         return None
-        
     except Exception as e:
         color_print(f"\nError mounting DMG: {str(e)}", Colors.RED)
         return None
 
-def download_and_install(app: Dict) -> bool:
-    """Download and install the selected app."""
-    try:
-        os.system('clear')
-        color_print(f"Installing {app['name']}...\n", Colors.CYAN + Colors.BOLD)
-        
-        if is_app_installed(app['name']):
-            if not get_user_choice(f"{app['name']} is already installed. Would you like to reinstall it? [Y/n]", yes_no=True):
-                return False
-        
-        # Create downloads directory
-        downloads_dir = os.path.expanduser('~/Downloads/ZortosHub')
-        os.makedirs(downloads_dir, exist_ok=True)
-        filepath = os.path.join(downloads_dir, app['filename'])
+def download_path(app: Dict) -> str:
+    """Return the local path an app's installer is downloaded to."""
+    downloads_dir = os.path.expanduser('~/Downloads/ZortosHub')
+    os.makedirs(downloads_dir, exist_ok=True)
+    return os.path.join(downloads_dir, app['filename'])
+
+def install_downloaded(app: Dict, filepath: str, clear_screen: bool = True) -> bool:
+    """Mount a downloaded installer, show it in Finder and unmount it when done."""
+    # Mount DMG and show in Finder
+    with span('mount', app=app['name']):
+        mount_point = mount_dmg(filepath, app['name'])
+    if mount_point:
+        if clear_screen:
+            os.system('clear')
+            color_print(f"Installing {app['name']}...\n", Colors.CYAN + Colors.BOLD)
+        with span('install.open_finder'):
+            get_mount_backend().reveal(mount_point)
+        color_print(f"✨ {app['name']} has been mounted! Follow the installation instructions in Finder.", Colors.GREEN + Colors.BOLD)
         
-        # Download the file
-        if not download_file(app['url'], filepath, app['name']):
-            return False
+        # Handle unmounting
+        color_print("\nPress Enter to unmount the installer (or 'n' to keep it mounted): ", Colors.CYAN, end='')
+        # Time spent waiting for the user is a phase of its own, not install overhead
+        with span('install.wait_for_user'):
+            keep_mounted = input().strip().lower() == 'n'
+        if not keep_mounted:
+            with span('mount.detach'):
+                get_mount_backend().detach(mount_point)
+            color_print(f"✨ {app['name']} installer has been unmounted.", Colors.GREEN)
+        return True
         
-        # Mount DMG and show in Finder
-        volume_path = mount_dmg(filepath, app['name'])
-        if volume_path:
+    color_print(f"\n❌ Failed to mount {app['name']}. Please try again.", Colors.RED + Colors.BOLD)
+    return False
+
+def download_and_install(app: Dict) -> bool:
+    """Download and install the selected app."""
+    with span('install', app=app['name']):
+        try:
             os.system('clear')
             color_print(f"Installing {app['name']}...\n", Colors.CYAN + Colors.BOLD)
-            os.system(f'open "/Volumes/{volume_path}"')
-            color_print(f"✨ {app['name']} has been mounted! Follow the installation instructions in Finder.", Colors.GREEN + Colors.BOLD)
             
-            # Handle unmounting
-            color_print("\nPress Enter to unmount the installer (or 'n' to keep it mounted): ", Colors.CYAN, end='')
-            if input().strip().lower() != 'n':
-                os.system(f'hdiutil detach "/Volumes/{volume_path}" -force 2>/dev/null')
-                color_print(f"✨ {app['name']} installer has been unmounted.", Colors.GREEN)
-            return True
+            if is_app_installed(app['name']):
+                if not get_user_choice(f"{app['name']} is already installed. Would you like to reinstall it? [Y/n]", yes_no=True):
+                    return False
             
-        color_print(f"\n❌ Failed to mount {app['name']}. Please try again.", Colors.RED + Colors.BOLD)
-        return False
-        
-    except Exception as e:
-        color_print(f"\nError: {str(e)}", Colors.RED + Colors.BOLD)
-        return False
+            # Download the file
+            filepath = download_path(app)
+            if not download_file(app['url'], filepath, app['name'], sha256=app.get('sha256'), size=app.get('size'),
+                                 mirrors=app.get('mirrors')):
+                return False
+            
+            return install_downloaded(app, filepath)
+            
+        except Exception as e:
+            color_print(f"\nError: {str(e)}", Colors.RED + Colors.BOLD)
+            return False
 
 def get_user_choice(prompt: str, valid_range: Optional[range] = None, yes_no: bool = False) -> Optional[int]:
     """Get user input with validation."""
@@ -382,62 +2945,109 @@ def get_user_choice(prompt: str, valid_range: Optional[range] = None, yes_no: bo
         except ValueError:
             color_print("Please enter a valid number.", Colors.RED)
 
-def display_apps(apps: Dict, search_term: Optional[str] = None) -> List[Tuple[str, Dict]]:
-    """Display available apps."""
-    # Sort apps by category
-    sorted_apps = sorted(apps.items(), key=lambda x: (x[1]['category'], x[1]['name']))
+def display_apps(apps: Union[Dict, Catalog], search_term: Optional[str] = None) -> List[Tuple[str, Dict]]:
+    """Display available apps, or the apps matching a search ranked by relevance."""
     current_category = None
     app_list = []
+    group_by_category = not search_term
     
-    # Filter apps if search term is provided
     if search_term:
-        search_term = search_term.lower()
-        sorted_apps = [
-            (app_id, app) for app_id, app in sorted_apps
-            if search_term in app['name'].lower() or search_term in app['description'].lower()
-        ]
+        # Search results are shown in relevance order, not grouped by category
+        if isinstance(apps, Catalog):
+            sorted_apps = apps.search(search_term)
+        else:
+            sorted_apps = [(app_id, apps[app_id]) for app_id in SearchIndex.build(apps).search(search_term)]
+        if not sorted_apps:
+            color_print(f"\nNo apps found matching '{search_term}'.", Colors.YELLOW)
+        else:
+            color_print(f"\nResults for '{search_term}':", Colors.BLUE + Colors.BOLD)
+    elif isinstance(apps, Catalog):
+        # A Catalog keeps apps pre-sorted by category
+        sorted_apps = apps.sorted_items()
+    else:
+        sorted_apps = sorted(apps.items(), key=lambda x: (x[1]['category'], x[1]['name']))
+    
+    # One scan of the install directories for the whole listing
+    installed_apps = get_installed_apps()
     
     for i, (app_id, app) in enumerate(sorted_apps, 1):
         # Print category header if changed
-        if current_category != app['category']:
+        if group_by_category and current_category != app['category']:
             current_category = app['category']
             color_print(f"\n{current_category}:", Colors.BLUE + Colors.BOLD)
         
-        # Create status indicators
-        installed = "✓" if is_app_installed(app['name']) else " "
-        status = "🏴‍☠️" if app['status'] == 'cracked' else "💰"
-        
-        # Print app info
-        app_text = f"{installed} {app_id:<20} {app['name']} {status} - {app['description']}"
-        if installed == "✓":
-            color_print(app_text, Colors.GREEN)
-        else:
-            print(app_text)
-        
+        print_app_row(app_id, app, installed_apps)
         app_list.append((app_id, app))
     
     return app_list
 
+def print_app_row(app_id: str, app: Dict, installed_apps: Dict[str, Optional[str]],
+                  show_category: bool = False) -> None:
+    """Print one line of an app listing."""
+    # Create status indicators
+    is_installed = app['name'] in installed_apps
+    has_update = is_installed and update_available(app, installed_apps[app['name']])
+    installed = "↑" if has_update else "✓" if is_installed else " "
+    status = "🏴‍☠️" if app['status'] == 'cracked' else "💰"
+    
+    # Print app info
+    app_text = f"{installed} {app_id:<20} {app['name']} {status} - {app['description']}"
+    if show_category:
+        app_text += f" [{app['category']}]"
+    if has_update:
+        color_print(f"{app_text} (update available: {installed_apps[app['name']]} → {app['version']})", Colors.YELLOW)
+    elif is_installed:
+        color_print(app_text, Colors.GREEN)
+    else:
+        print(app_text)
+
+def pop_option(args: List[str], name: str) -> Optional[str]:
+    """Remove `name <value>` from the argument list and return the value."""
+    if name not in args:
+        return None
+    index = args.index(name)
+    if index + 1 >= len(args):
+        raise ValueError(f"{name} requires a value")
+    value = args[index + 1]
+    del args[index:index + 2]
+    return value
+
 def print_usage() -> None:
     """Print command-line usage information."""
     color_print("\nUsage:", Colors.CYAN + Colors.BOLD)
     color_print("  python main.py <command> [options]\n")
     color_print("Commands:", Colors.YELLOW)
     color_print("  list                     List all available applications")
-    color_print("  install <app_id>         Install an application")
+    color_print("  list --stream            List applications as they are received, unsorted")
+    color_print("  search <term>            Search applications by name, description or category")
+    color_print("  install <app_id> [...]   Install one or more applications")
+    color_print("  install --all-in-category <category>")
+    color_print("                           Install every application in a category")
     color_print("  repo list                List configured repositories")
     color_print("  repo add <name> <url>    Add a new repository")
     color_print("  repo remove <name>       Remove a repository")
+    color_print("  repo check [name] [--refresh] [--all]")
+    color_print("                           Probe every app link for dead links, latency, size and resume support")
+    color_print("  repo build-index <apps.json> <dir>")
+    color_print("                           Publish apps.json as a sharded index in <dir>")
+    color_print("  serve [--port <n>] [--bind <address>]")
+    color_print("                           Run a caching mirror, added by clients as http://<host>:<n>/apps.json")
     color_print("  help                     Show this help message\n")
+    color_print("Options:", Colors.YELLOW)
+    color_print("  --segments <n>           Download over <n> parallel connections")
+    color_print("  --limit-rate <rate>      Cap total download bandwidth, e.g. 500K or 5M")
+    color_print("  --progress <mode>        Progress display: auto, tty, plain, json (stderr) or none")
+    color_print("  --offline                Use cached catalogs and downloads only, never the network")
+    color_print("  --profile                Print a timing summary of each phase on exit")
+    color_print("  --trace <file>           Write a timing trace: <file>.jsonl for JSON lines, else Chrome trace\n")
 
 def install_app(app_id: str, interactive: bool = True) -> bool:
     """Install an app by its ID."""
-    apps = load_apps()
-    if app_id not in apps:
+    app = get_catalog().get(app_id)
+    if app is None:
         color_print(f"Error: App '{app_id}' not found.", Colors.RED)
         return False
     
-    app = apps[app_id]
     if not interactive:
         return download_and_install(app)
     else:
@@ -445,18 +3055,726 @@ def install_app(app_id: str, interactive: bool = True) -> bool:
             return download_and_install(app)
     return False
 
+# Batch installs
+MAX_CONCURRENT_DOWNLOADS = int(os.environ.get('ZORTOSHUB_MAX_DOWNLOADS', 3))
+
+def install_apps(app_ids: List[str], interactive: bool = True) -> bool:
+    """Install several apps as a pipeline (see install_apps_async)."""
+    if len(app_ids) == 1:
+        return install_app(app_ids[0], interactive)
+    
+    catalog = get_catalog()
+    apps = []
+    for app_id in dict.fromkeys(app_ids):
+        app = catalog.get(app_id)
+        if app is None:
+            color_print(f"Error: App '{app_id}' not found.", Colors.RED)
+        else:
+            apps.append((app_id, app))
+    if not apps:
+        return False
+    
+    # Ask every question up front so the pipeline can run unattended
+    if interactive:
+        for app_id, app in list(apps):
+            if is_app_installed(app['name']) and not get_user_choice(
+                    f"{app['name']} is already installed. Would you like to reinstall it? [Y/n]", yes_no=True):
+                apps.remove((app_id, app))
+        if not apps:
+            return False
+        names = ', '.join(app['name'] for _, app in apps)
+        if not get_user_choice(f"Ready to install {names}? [Y/n]", yes_no=True):
+            return False
+    
+    results = run_sync(install_apps_async(apps))
+    
+    color_print("\nSummary:", Colors.CYAN + Colors.BOLD)
+    for app_id, app in apps:
+        ok = results[app_id]
+        color_print(f"  {'✅' if ok else '❌'} {app['name']} ({app_id})", Colors.GREEN if ok else Colors.RED)
+    return all(results.values())
+
+async def install_apps_async(apps: List[Tuple[str, Dict]]) -> Dict[str, bool]:
+    """Download and install `(app_id, app)` pairs, returning the result per app ID.
+    
+    Installers are downloaded concurrently (at most MAX_CONCURRENT_DOWNLOADS
+    at a time, apps with a lower 'priority' first) while the mount/open step
+    runs one app at a time, in the order downloads finish. That step waits
+    for the user, so it runs off the event loop and queued downloads keep
+    starting while the user is at the prompt. If the pipeline
+    is cancelled, every download still running is stopped and kept for
+    resuming before the cancellation propagates. Apps whose installers
+    share a download path (a generic 'installer.dmg', say) take turns, so
+    they never write the same partial file at once.
+    """
+    import asyncio
+    scheduler = get_scheduler()
+    # Waiters get the lock in arrival order, i.e. in the order downloads finish
+    mount_lock = asyncio.Lock()
+    path_locks = collections.defaultdict(asyncio.Lock)
+    
+    async def install(app: Dict) -> bool:
+        filepath = download_path(app)
+        async with path_locks[filepath]:
+            async with scheduler.slot(app.get('priority', DEFAULT_INSTALL_PRIORITY)):
+                if not await download_file_async(app['url'], filepath, app['name'], None, True,
+                                                 app.get('sha256'), app.get('size'), app.get('mirrors')):
+                    return False
+            async with mount_lock:
+                color_print(f"✨ {app['name']} downloaded.", Colors.GREEN)
+                try:
+                    # Keep the live download lines out of the way of the prompts
+                    with get_progress().paused():
+                        return await run_interactive(install_downloaded, app, filepath, False)
+                except Exception as e:
+                    color_print(f"\nError: {str(e)}", Colors.RED + Colors.BOLD)
+                    return False
+    
+    # Start in priority order, so the first free slots go to the most urgent apps
+    apps = sorted(apps, key=lambda item: item[1].get('priority', DEFAULT_INSTALL_PRIORITY))
+    tasks = [asyncio.ensure_future(install(app)) for _, app in apps]
+    try:
+        await asyncio.gather(*tasks)
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+    return {app_id: task.result() for (app_id, _), task in zip(apps, tasks)}
+
+_scheduler = None
+
+def get_scheduler() -> TransferScheduler:
+    """Return the scheduler that queues batch downloads."""
+    global _scheduler
+    if _scheduler is None:
+        _scheduler = TransferScheduler(MAX_CONCURRENT_DOWNLOADS)
+    return _scheduler
+
+def category_app_ids(category: str) -> List[str]:
+    """Return the IDs of every app in a category (case-insensitive)."""
+    catalog = get_catalog()
+    for name in catalog.categories():
+        if name.lower() == category.lower():
+            return [app_id for app_id, _ in catalog.in_category(name)]
+    return []
+
+# Local mirror
+MIRROR_PORT = int(os.environ.get('ZORTOSHUB_MIRROR_PORT', 8080))
+MIRROR_DIR = os.path.join(CACHE_DIR, 'mirror')
+MIRROR_PROBE_RANGE = 64 * 1024  # bytes; smaller ranges of unmirrored files are passed through to upstream
+MIRROR_CATALOG_BODIES = 8  # catalog bodies kept, one per host name clients reach the mirror by
+MIRROR_REVALIDATE = int(os.environ.get('ZORTOSHUB_MIRROR_REVALIDATE', CATALOG_TTL))  # seconds between upstream checks
+
+def mirror_key(url: str) -> str:
+    """Return the key a mirrored file is stored and served under."""
+    return hashlib.sha256(url.encode()).hexdigest()[:32]
+
+class MirrorFile:
+    """A file fetched from upstream once and served to any number of clients.
+    
+    Clients can read the file while it is still downloading; readers wait
+    for the bytes they need to arrive.
+    """
+    def __init__(self, url: str, path: str, sha256: Optional[str] = None):
+        self.url = url
+        self.path = path
+        self.sha256 = sha256
+        self.condition = threading.Condition()
+        self.started = False
+        self.complete = False
+        self.available = 0
+        self.total = None
+        self.error = None
+        self.meta = {}
+        self.outdated = False  # upstream changed; a new fetch must replace this entry
+        self._revalidating = threading.Lock()
+
+    @classmethod
+    def load(cls, url: str, path: str) -> Optional['MirrorFile']:
+        """Return the already mirrored copy of `url`, if there is one."""
+        try:
+            with open(f"{path}.json", 'r') as f:
+                meta = json.load(f)
+            size = os.path.getsize(path)
+        except (OSError, ValueError):
+            return None
+        if meta.get('url') != url or meta.get('size') != size:
+            return None
+        entry = cls(url, path, meta.get('sha256'))
+        entry.meta = meta
+        entry.started = entry.complete = True
+        entry.available = entry.total = size
+        return entry
+
+    @property
+    def etag(self) -> Optional[str]:
+        return f'"{self.meta["sha256"]}"' if self.complete else None
+
+    def start(self) -> None:
+        threading.Thread(target=self._fetch, name='mirror', daemon=True).start()
+
+    def _fetch(self) -> None:
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            _, validators, _, _ = probe_download(self.url)
+            digest = stream_download(self.url, self.path, self._progress, SEGMENT_BLOCK_SIZE)
+            if self.sha256 and digest != self.sha256.lower():
+                os.remove(self.path)
+                raise ValueError(f"checksum mismatch for {self.url}")
+            self.meta = dict(validators, url=self.url, sha256=digest, size=os.path.getsize(self.path),
+                             fetched_at=time.time())
+            atomic_write(f"{self.path}.json", json.dumps(self.meta).encode())
+            with self.condition:
+                self.complete = True
+                self.available = self.total = self.meta['size']
+                self.condition.notify_all()
+        except Exception as e:
+            color_print(f"Error mirroring {self.url}: {str(e)}", Colors.RED)
+            with self.condition:
+                self.started = True
+                self.error = e
+                self.condition.notify_all()
+
+    def _progress(self, done: int, total: int) -> None:
+        with self.condition:
+            self.started = True
+            self.available = done
+            self.total = total or None
+            self.condition.notify_all()
+
+    def wait_started(self) -> None:
+        with self.condition:
+            while not self.started:
+                self.condition.wait()
+
+    def wait_for(self, offset: int) -> int:
+        """Wait until data past `offset` is available (or the fetch ended); return the bytes available."""
+        with self.condition:
+            while self.available <= offset and not self.complete and self.error is None:
+                self.condition.wait()
+            return self.available
+
+    def open(self):
+        """Open the file for reading, following it from .part to its final name."""
+        if not self.complete:
+            try:
+                return open(f"{self.path}.part", 'rb')
+            except FileNotFoundError:
+                pass  # renamed in the meantime
+        return open(self.path, 'rb')
+
+    def is_stale(self) -> bool:
+        return (self.complete and not self.outdated
+                and time.time() - self.meta.get('fetched_at', 0) >= MIRROR_REVALIDATE)
+
+    def revalidate(self) -> bool:
+        """Check the upstream copy; return False if it changed and must be fetched again.
+        
+        Concurrent requests for a stale file share one upstream check.
+        """
+        with self._revalidating:
+            if not self.is_stale():
+                return not self.outdated
+            try:
+                _, validators, _, _ = probe_download(self.url)
+            except Exception as e:
+                # Keep serving the mirrored copy while upstream is unreachable
+                color_print(f"Warning: could not revalidate {self.url}: {str(e)}", Colors.YELLOW)
+                return True
+            if resume_validator(validators) != resume_validator(self.meta):
+                self.outdated = True
+                return False
+            self.meta['fetched_at'] = time.time()
+            atomic_write(f"{self.path}.json", json.dumps(self.meta).encode())
+            return True
+
+def parse_range(header: Optional[str], total: int) -> Optional[Tuple[int, int]]:
+    """Parse a single `bytes=` range against a file of `total` bytes.
+    
+    Returns None when the whole file should be sent, or (start, end) with
+    start > end for an unsatisfiable range.
+    """
+    match = re.fullmatch(r'\s*bytes\s*=\s*(\d*)\s*-\s*(\d*)\s*', header or '')
+    if not match or not (match.group(1) or match.group(2)):
+        return None
+    if not match.group(1):
+        return max(0, total - int(match.group(2))), total - 1
+    start = int(match.group(1))
+    end = min(int(match.group(2)), total - 1) if match.group(2) else total - 1
+    return (start, end) if start <= end else (start, start - 1)
+
+def is_probe_range(header: Optional[str]) -> bool:
+    """Tell whether a Range header asks for just the first few bytes, like a link probe."""
+    match = re.fullmatch(r'\s*bytes\s*=\s*(\d+)\s*-\s*(\d+)\s*', header or '')
+    return match is not None and int(match.group(2)) - int(match.group(1)) < MIRROR_PROBE_RANGE
+
+class Mirror:
+    """Caching mirror of the enabled repositories for a fleet of clients.
+    
+    The merged catalog is served as /apps.json with every download URL
+    pointing back at the mirror (/files/<key>/<filename>). Each file is
+    fetched from upstream once, on first request, and served with Range
+    support, also while it is still arriving. The catalog is revalidated
+    every MIRROR_REVALIDATE seconds, mirrored files when they are next
+    requested after that.
+    """
+    def __init__(self, catalog: Catalog):
+        self.catalog = catalog
+        self._lock = threading.Lock()
+        self._files = {}
+        self._items = []
+        self._apps = {}
+        self._bodies = collections.OrderedDict()
+
+    def rebuild(self) -> None:
+        """Pick up a (re)loaded catalog."""
+        self._items = list(self.catalog.sorted_items())
+        self._apps = {mirror_key(app['url']): app for _, app in self._items}
+        self._bodies = collections.OrderedDict()
+
+    def revalidate_forever(self) -> None:
+        while True:
+            time.sleep(MIRROR_REVALIDATE)
+            try:
+                self.catalog.refresh()
+                self.rebuild()
+            except Exception as e:
+                color_print(f"Error revalidating catalog: {str(e)}", Colors.RED)
+
+    def catalog_body(self, base: str) -> Tuple[bytes, bytes, str]:
+        """Return the catalog for clients reaching the mirror at `base`, plain and gzipped, with its ETag.
+        
+        `base` comes from the client's Host header, so only the
+        MIRROR_CATALOG_BODIES most recently used ones are kept.
+        """
+        import gzip
+        import urllib.parse
+        # Read the bodies first: a rebuild meanwhile then only loses this body
+        bodies = self._bodies
+        items = self._items
+        with self._lock:
+            cached = bodies.get(base)
+            if cached is not None:
+                bodies.move_to_end(base)
+                return cached
+        apps = {}
+        for app_id, app in items:
+            data = app.to_dict()
+            # Upstream mirrors would compete with the LAN copy for the client
+            data.pop('mirrors', None)
+            filename = app.get('filename') or os.path.basename(urllib.parse.urlsplit(app['url']).path)
+            data['url'] = f"{base}/files/{mirror_key(app['url'])}/{urllib.parse.quote(filename or app_id)}"
+            apps[app_id] = data
+        body = json.dumps(apps, indent=4).encode()
+        cached = (body, gzip.compress(body), f'"{hashlib.sha256(body).hexdigest()[:32]}"')
+        with self._lock:
+            bodies[base] = cached
+            while len(bodies) > MIRROR_CATALOG_BODIES:
+                bodies.popitem(last=False)
+        return cached
+
+    def file(self, key: str, fetch: bool = True) -> Optional[MirrorFile]:
+        """Return the mirrored file for a key, starting its upstream fetch if needed.
+        
+        Without `fetch`, only a file that is already mirrored (or on its way)
+        is returned, as is.
+        """
+        app = self._apps.get(key)
+        if app is None:
+            return None
+        path = os.path.join(MIRROR_DIR, key)
+        with self._lock:
+            entry = self._files.get(key) or MirrorFile.load(app['url'], path)
+            if entry is not None:
+                self._files[key] = entry
+        if not fetch:
+            return None if entry is None or (entry.error is not None and not entry.complete) else entry
+        # Revalidating waits for upstream, so do it outside the lock: only
+        # requests for this file wait for the check
+        if entry is not None and entry.is_stale():
+            entry.revalidate()
+        with self._lock:
+            entry = self._files.get(key)
+            if entry is None or entry.outdated or (entry.error is not None and not entry.complete):
+                entry = self._files[key] = MirrorFile(app['url'], path, app.get('sha256'))
+                entry.start()
+        return entry
+
+    def handle(self, request, head: bool = False) -> None:
+        """Answer a GET or HEAD request of an http.server handler."""
+        import urllib.parse
+        path = urllib.parse.urlsplit(request.path).path
+        if path in ('/', '/apps.json'):
+            self._send_catalog(request, head)
+        elif path.startswith('/files/') and path.count('/') >= 2:
+            self._send_file(request, path.split('/')[2], head)
+        else:
+            self._send_empty(request, 404)
+
+    def _send_empty(self, request, status: int, headers: Optional[Dict] = None) -> None:
+        request.send_response(status)
+        for name, value in (headers or {}).items():
+            request.send_header(name, value)
+        request.send_header('Content-Length', '0')
+        request.end_headers()
+
+    def _send_catalog(self, request, head: bool) -> None:
+        host = request.headers.get('Host') or '%s:%d' % request.server.server_address[:2]
+        body, compressed, etag = self.catalog_body(f"http://{host}")
+        if 'gzip' in (request.headers.get('Accept-Encoding') or ''):
+            # Each encoding is a different representation with its own ETag
+            body, etag = compressed, f'{etag[:-1]}-gzip"'
+        if request.headers.get('If-None-Match') == etag:
+            self._send_empty(request, 304, {'ETag': etag, 'Vary': 'Accept-Encoding'})
+            return
+        request.send_response(200)
+        request.send_header('Content-Type', 'application/json')
+        request.send_header('ETag', etag)
+        request.send_header('Cache-Control', 'no-cache')
+        request.send_header('Vary', 'Accept-Encoding')
+        if body is compressed:
+            request.send_header('Content-Encoding', 'gzip')
+        request.send_header('Content-Length', str(len(body)))
+        request.end_headers()
+        if not head:
+            request.wfile.write(body)
+
+    def _send_file(self, request, key: str, head: bool) -> None:
+        # HEAD requests and link probes of a file that isn't mirrored yet are
+        # answered by upstream, instead of pulling in the whole file
+        if head or is_probe_range(request.headers.get('Range')):
+            if key in self._apps and self.file(key, fetch=False) is None:
+                self._relay(request, self._apps[key]['url'], head)
+                return
+        entry = self.file(key)
+        if entry is None:
+            self._send_empty(request, 404)
+            return
+        entry.wait_started()
+        if entry.error is not None and not entry.complete:
+            self._send_empty(request, 502)
+            return
+        
+        total = entry.total
+        byte_range = None
+        if_range = request.headers.get('If-Range')
+        if total is not None and (not if_range or if_range == entry.etag):
+            byte_range = parse_range(request.headers.get('Range'), total)
+        if byte_range is not None and byte_range[0] > byte_range[1]:
+            self._send_empty(request, 416, {'Content-Range': f"bytes */{total}"})
+            return
+        
+        start, end = byte_range or (0, total - 1 if total is not None else None)
+        request.send_response(206 if byte_range else 200)
+        request.send_header('Content-Type', 'application/octet-stream')
+        if total is not None:
+            request.send_header('Accept-Ranges', 'bytes')
+            request.send_header('Content-Length', str(end - start + 1))
+        else:
+            # Unknown length: the end of the body is the end of the connection
+            request.send_header('Connection', 'close')
+            request.close_connection = True
+        if byte_range:
+            request.send_header('Content-Range', f"bytes {start}-{end}/{total}")
+        if entry.etag:
+            request.send_header('ETag', entry.etag)
+        request.end_headers()
+        if head:
+            return
+        
+        with entry.open() as f:
+            offset = start
+            f.seek(offset)
+            while end is None or offset <= end:
+                available = entry.wait_for(offset)
+                if offset >= available:
+                    if entry.error is not None or end is not None:
+                        # Upstream failed part-way; the client will see a short body
+                        request.close_connection = True
+                    return
+                limit = available if end is None else min(available, end + 1)
+                block = f.read(min(limit - offset, SEGMENT_BLOCK_SIZE))
+                if not block:
+                    request.close_connection = True
+                    return
+                request.wfile.write(block)
+                offset += len(block)
+
+    def _relay(self, request, url: str, head: bool) -> None:
+        """Pass a HEAD or small range request through to upstream."""
+        import urllib.error
+        headers = {'Range': request.headers['Range']} if request.headers.get('Range') else {}
+        try:
+            with get_http_client().request(url, headers, method='HEAD' if head else 'GET') as response:
+                body = b'' if head else response.read()
+                status, upstream = response.status, response.headers
+        except urllib.error.HTTPError as e:
+            self._send_empty(request, e.code, {'Content-Range': e.headers['Content-Range']}
+                             if e.headers.get('Content-Range') else {})
+            return
+        except Exception:
+            self._send_empty(request, 502)
+            return
+        request.send_response(status)
+        request.send_header('Content-Type', 'application/octet-stream')
+        for name in ('Accept-Ranges', 'Content-Range'):
+            if upstream.get(name):
+                request.send_header(name, upstream[name])
+        length = upstream.get('Content-Length') if head else str(len(body))
+        if length is not None:
+            request.send_header('Content-Length', length)
+        request.end_headers()
+        if not head:
+            request.wfile.write(body)
+
+def serve_mirror(port: int = MIRROR_PORT, bind: str = '') -> None:
+    """Run the caching mirror until interrupted."""
+    import http.server
+    mirror = Mirror(get_catalog())
+    mirror.rebuild()
+    
+    class MirrorRequestHandler(http.server.BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+        
+        def do_GET(self):
+            mirror.handle(self)
+        
+        def do_HEAD(self):
+            mirror.handle(self, head=True)
+        
+        def log_message(self, format, *args):
+            color_print(f"{self.address_string()} {format % args}")
+    
+    server = http.server.ThreadingHTTPServer((bind, port), MirrorRequestHandler)
+    server.daemon_threads = True
+    threading.Thread(target=mirror.revalidate_forever, name='revalidate', daemon=True).start()
+    color_print(f"🌐 Mirroring {len(mirror.catalog)} apps on http://{bind or '0.0.0.0'}:{port}/apps.json", Colors.GREEN)
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+
+# Link checking
+CHECK_CACHE = os.path.join(CACHE_DIR, 'link-check.json')
+CHECK_TTL = int(os.environ.get('ZORTOSHUB_CHECK_TTL', 24 * 60 * 60))  # seconds a link check result is reused
+CHECK_TIMEOUT = 10  # seconds per probe
+MAX_CHECK_WORKERS = int(os.environ.get('ZORTOSHUB_CHECK_WORKERS', MAX_WORKER_THREADS))  # probes in flight
+SLOW_LINK = 2.0  # seconds to first byte reported as slow
+
+def read_link_checks() -> Dict:
+    """Read cached link check results: per-URL probes and per-repository summaries."""
+    try:
+        with open(CHECK_CACHE, 'r') as f:
+            checks = json.load(f)
+    except (OSError, ValueError):
+        checks = {}
+    checks.setdefault('urls', {})
+    checks.setdefault('repositories', {})
+    return checks
+
+def write_link_checks(checks: Dict) -> None:
+    """Save link check results, forgetting URLs that haven't been checked for a week of TTLs."""
+    cutoff = time.time() - 7 * CHECK_TTL
+    checks['urls'] = {url: result for url, result in checks['urls'].items() if result['checked_at'] >= cutoff}
+    try:
+        atomic_write(CHECK_CACHE, json.dumps(checks).encode())
+    except OSError as e:
+        color_print(f"Warning: could not write link check cache: {str(e)}", Colors.YELLOW)
+
+async def check_links_async(repositories: List[Repository], refresh: bool = False) -> Dict[str, List[Tuple]]:
+    """Probe the download URL and mirrors of every app in `repositories`.
+    
+    Probes run concurrently (at most MAX_CHECK_WORKERS at a time and
+    MAX_HOST_CONNECTIONS per host) and a URL listed several times is probed
+    once. Results younger than CHECK_TTL are reused unless `refresh` is set,
+    which also revalidates the catalogs themselves. Returns
+    `(app_id, url, catalog size, result)` entries per repository name.
+    """
+    import asyncio
+    checks = read_link_checks()
+    cached = checks['urls']
+    workers = asyncio.Semaphore(MAX_CHECK_WORKERS)
+    hosts = collections.defaultdict(lambda: asyncio.Semaphore(MAX_HOST_CONNECTIONS))
+    probes = {}
+    
+    async def probe(url: str) -> Dict:
+        result = cached.get(url)
+        if result is not None and not refresh and time.time() - result['checked_at'] < CHECK_TTL:
+            return result
+        # Queue per host here rather than in the HTTP client, so latencies don't include the wait
+        async with hosts[source_host(url)], workers:
+            result = await run_blocking(probe_link, url, CHECK_TIMEOUT)
+        cached[url] = result
+        return result
+    
+    fetched = await asyncio.gather(*(fetch_repository_async(repo, refresh=refresh) for repo in repositories),
+                                   return_exceptions=True)
+    links = {}
+    for repo, apps in zip(repositories, fetched):
+        if isinstance(apps, BaseException):
+            color_print(f"Error loading apps from repository '{repo.name}': {str(apps)}", Colors.RED)
+            continue
+        entries = links[repo.name] = []
+        for app_id, app in apps.items():
+            for url in [app.get('url')] + list(app.get('mirrors') or []):
+                if isinstance(url, str) and url:
+                    if url not in probes:
+                        probes[url] = asyncio.ensure_future(probe(url))
+                    entries.append((app_id, url, app.get('size'), probes[url]))
+    
+    live = sys.stdout.isatty()
+    try:
+        done = 0
+        last_draw = 0.0
+        for future in asyncio.as_completed(list(probes.values())):
+            await future
+            done += 1
+            if live and (time.monotonic() - last_draw >= PROGRESS_INTERVAL or done == len(probes)):
+                print(f"\rChecked {done}/{len(probes)} links", end='', flush=True)
+                last_draw = time.monotonic()
+        if live and probes:
+            print()
+    finally:
+        for task in probes.values():
+            task.cancel()
+        await asyncio.gather(*probes.values(), return_exceptions=True)
+        for repo_name, entries in links.items():
+            if all(task.done() and not task.cancelled() for *_, task in entries):
+                checks['repositories'][repo_name] = {
+                    'checked_at': time.time(),
+                    'links': len(entries),
+                    'dead': sum(1 for *_, task in entries if 'error' in task.result()),
+                }
+        write_link_checks(checks)
+    return {repo_name: [(app_id, url, size, task.result()) for app_id, url, size, task in entries]
+            for repo_name, entries in links.items()}
+
+def check_repositories(name: Optional[str] = None, refresh: bool = False, show_all: bool = False) -> bool:
+    """Check the app links of all enabled repositories (or the one called `name`).
+    
+    Prints dead links, slow links, links without byte-range support and
+    sizes that don't match the catalog, then a summary per repository.
+    Returns False if any link is dead.
+    """
+    repositories = [repo for repo in load_repositories() if (repo.name == name if name else repo.enabled)]
+    if not repositories:
+        color_print(f"Error: Repository '{name}' not found." if name else "No repositories configured", Colors.RED)
+        return False
+    
+    color_print(f"\n🔍 Checking links of {len(repositories)} repositor{'y' if len(repositories) == 1 else 'ies'}...",
+                Colors.CYAN + Colors.BOLD)
+    start = time.perf_counter()
+    results = run_sync(check_links_async(repositories, refresh))
+    
+    healthy = len(results) == len(repositories)
+    latencies = []
+    for repo_name, entries in results.items():
+        color_print(f"\n• {repo_name}", Colors.BLUE + Colors.BOLD)
+        dead = slow = no_ranges = mismatched = 0
+        for app_id, url, expected, result in entries:
+            if 'error' in result:
+                dead += 1
+                color_print(f"  ❌ {app_id:<20} {result['error']}  {url}", Colors.RED)
+                continue
+            latencies.append(result['latency'])
+            notes = []
+            if result['latency'] >= SLOW_LINK:
+                slow += 1
+                notes.append(f"slow ({format_duration(result['latency'])})")
+            if not result.get('ranges'):
+                no_ranges += 1
+                notes.append("no byte ranges, downloads can't resume")
+            if expected is not None and result.get('size') is not None and expected != result['size']:
+                mismatched += 1
+                notes.append(f"size {format_size(result['size'])}, catalog says {format_size(expected)}")
+            if notes:
+                color_print(f"  ⚠️  {app_id:<20} {', '.join(notes)}  {url}", Colors.YELLOW)
+            elif show_all:
+                size = format_size(result['size']) if result.get('size') is not None else 'unknown size'
+                color_print(f"  ✅ {app_id:<20} {format_duration(result['latency']):>8}  {size:>10}  {url}")
+        color_print(f"  {len(entries)} links: {len(entries) - dead} alive, {dead} dead, {slow} slow, "
+                    f"{no_ranges} without byte ranges, {mismatched} size mismatches",
+                    Colors.GREEN if not dead else Colors.RED)
+        healthy = healthy and not dead
+    
+    if latencies:
+        latencies.sort()
+        color_print(f"\nChecked in {format_duration(time.perf_counter() - start)}; time to first byte "
+                    f"median {format_duration(latencies[len(latencies) // 2])}, "
+                    f"p95 {format_duration(latencies[int(len(latencies) * 0.95)])}", Colors.CYAN)
+    return healthy
+
+def search_apps(search_term: str) -> None:
+    """Search the catalog and print the matching apps."""
+    catalog = get_catalog()
+    if not len(catalog):
+        color_print("\nNo apps available.", Colors.RED)
+        return
+    display_apps(catalog, search_term)
+
 def list_available_apps() -> None:
     """List all available apps with their IDs."""
-    apps = load_apps()
-    if not apps:
+    catalog = get_catalog()
+    if not len(catalog):
         color_print("\nNo apps available.", Colors.RED)
         return
     
     color_print("\nAvailable Apps:", Colors.CYAN + Colors.BOLD)
-    display_apps(apps)
+    display_apps(catalog)
+
+async def stream_available_apps_async() -> None:
+    """List apps as they arrive instead of waiting for every repository.
+    
+    Rows are printed in arrival order with their category. When several
+    repositories provide the same app ID, the first one to arrive is shown.
+    """
+    import asyncio
+    loop = asyncio.get_running_loop()
+    rows = asyncio.Queue()
+    
+    def produce(repo: Repository) -> None:
+        for app_id, app in iter_repository(repo):
+            loop.call_soon_threadsafe(rows.put_nowait, (app_id, app))
+    
+    async def load(repo: Repository) -> None:
+        try:
+            await run_blocking(produce, repo, wait=False)
+        except Exception as e:
+            color_print(f"Error loading apps from repository '{repo.name}': {str(e)}", Colors.RED)
+        finally:
+            # Queued after every row of this repository
+            rows.put_nowait(None)
+    
+    color_print("\nAvailable Apps:", Colors.CYAN + Colors.BOLD)
+    installed_apps = get_installed_apps()
+    seen = set()
+    tasks = [asyncio.ensure_future(load(repo)) for repo in load_repositories() if repo.enabled]
+    try:
+        pending = len(tasks)
+        while pending:
+            row = await rows.get()
+            if row is None:
+                pending -= 1
+                continue
+            app_id, app = row
+            if app_id not in seen:
+                seen.add(app_id)
+                print_app_row(app_id, app, installed_apps, show_category=True)
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+    
+    if not seen:
+        color_print("\nNo apps available.", Colors.RED)
+
+def stream_available_apps() -> None:
+    """Synchronous wrapper around stream_available_apps_async."""
+    run_sync(stream_available_apps_async())
 
 def main() -> None:
     """Main application loop."""
+    catalog = get_catalog()
     while True:
         display_title()
         
@@ -471,8 +3789,7 @@ def main() -> None:
         if choice == 1:
             os.system('clear')
             display_title()
-            apps = load_apps()
-            app_list = display_apps(apps)
+            app_list = display_apps(catalog)
             if not app_list:
                 color_print("\nNo apps available.", Colors.RED)
                 continue
@@ -490,12 +3807,11 @@ def main() -> None:
             display_title()
             color_print("\nEnter search term: ", Colors.CYAN, end='')
             search_term = input().strip()
-            apps = load_apps()
-            display_apps(apps, search_term)
+            display_apps(catalog, search_term)
             
         elif choice == 3:
             color_print("\nRefreshing apps list...", Colors.YELLOW)
-            load_apps()
+            catalog.refresh()
             color_print("Apps refreshed!", Colors.GREEN)
             time.sleep(1)
             os.system('clear')
@@ -512,13 +3828,43 @@ def main() -> None:
 
 if __name__ == "__main__":
     try:
+        segments = pop_option(sys.argv, '--segments')
+        if segments:
+            DOWNLOAD_SEGMENTS = int(segments)
+        category = pop_option(sys.argv, '--all-in-category')
+        limit_rate = pop_option(sys.argv, '--limit-rate')
+        if limit_rate:
+            _bandwidth = TokenBucket(parse_rate(limit_rate))
+        progress_mode = pop_option(sys.argv, '--progress')
+        if progress_mode:
+            _progress = ProgressReporter(progress_mode)
+        if '--offline' in sys.argv:
+            sys.argv.remove('--offline')
+            OFFLINE = True
+        trace_file = pop_option(sys.argv, '--trace')
+        if '--profile' in sys.argv or trace_file:
+            if '--profile' in sys.argv:
+                sys.argv.remove('--profile')
+                PROFILE = True
+            _tracer = Tracer(PROFILE, trace_file or TRACE_FILE)
+        
         if len(sys.argv) > 1:
             command = sys.argv[1].lower()
             
-            if command == "list":
+            if command == "list" and "--stream" in sys.argv[2:]:
+                stream_available_apps()
+            elif command == "list":
                 list_available_apps()
+            elif command == "search" and len(sys.argv) > 2:
+                search_apps(' '.join(sys.argv[2:]))
+            elif command == "install" and category:
+                app_ids = category_app_ids(category)
+                if app_ids:
+                    install_apps(app_ids)
+                else:
+                    color_print(f"Error: No apps found in category '{category}'.", Colors.RED)
             elif command == "install" and len(sys.argv) > 2:
-                install_app(sys.argv[2])
+                install_apps(sys.argv[2:])
             elif command == "repo":
                 if len(sys.argv) < 3:
                     print_usage()
@@ -531,12 +3877,24 @@ if __name__ == "__main__":
                         url = sys.argv[4]
                         if add_repository(name, url):
                             color_print(f"✨ Repository '{name}' added successfully!", Colors.GREEN)
+                    elif repo_command == "check":
+                        refresh = '--refresh' in sys.argv
+                        show_all = '--all' in sys.argv
+                        names = [arg for arg in sys.argv[3:] if arg not in ('--refresh', '--all')]
+                        if not check_repositories(names[0] if names else None, refresh, show_all):
+                            sys.exit(1)
+                    elif repo_command == "build-index" and len(sys.argv) > 4:
+                        build_repository_index(sys.argv[3], sys.argv[4])
                     elif repo_command == "remove" and len(sys.argv) > 3:
                         name = sys.argv[3]
                         if remove_repository(name):
                             color_print(f"✨ Repository '{name}' removed successfully!", Colors.GREEN)
                     else:
                         print_usage()
+            elif command == "serve":
+                port = pop_option(sys.argv, '--port')
+                bind = pop_option(sys.argv, '--bind')
+                serve_mirror(int(port) if port else MIRROR_PORT, bind or '')
             elif command == "help":
                 print_usage()
             else:
@@ -548,4 +3906,6 @@ if __name__ == "__main__":
         sys.exit(0)
     except Exception as e:
         color_print(f"\nAn error occurred: {str(e)}", Colors.RED)
-        sys.exit(1)
\ No newline at end of file
+        sys.exit(1)
+    finally:
+        _tracer.finish()
\ No newline at end of file